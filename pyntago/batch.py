@@ -0,0 +1,91 @@
+"""Pyntago: rules applied to large batches of boards at once with NumPy.
+Boards are given either as an (N, 6, 6) int8 array indexed [board, y, x] with EMPTY, FIRST or SECOND in every cell,
+or as an (N, 2) uint64 array with the masks of the first and second player (Bitboard fields).
+A packed Bitboard has 72 bits, so a single uint64 per board is not enough."""
+import numpy as np
+
+from pyntago import (BLOCK_ORIGINS, CELL_COUNT, FULL_MASK, OUTSIDE_BLOCK_MASKS, ROTATION_DIRECTIONS, ROTATION_TABLES,
+                     TIE)
+
+EMPTY, FIRST, SECOND = 0, 1, 2
+NO_WINNER = -2  # result of a board without winner, the others are 0, 1 and TIE
+ROTATIONS = [(block, direction) for block in range(4) for direction in ROTATION_DIRECTIONS]
+
+_CELL_BITS = np.uint64(1) << np.arange(CELL_COUNT, dtype=np.uint64)
+_FULL = np.uint64(FULL_MASK)
+_SEVEN = np.uint64(7)
+_THREE, _SIX = np.uint64(3), np.uint64(6)
+_SECOND_ROW, _THIRD_ROW = np.uint64(0o70), np.uint64(0o700)
+# Cells where a line of five can start, for lines going right, down, down right and down left
+_LINE_STARTS = [(np.uint64(1), np.uint64(0o030303030303)), (np.uint64(6), np.uint64(0o7777)),
+                (np.uint64(7), np.uint64(0o303)), (np.uint64(5), np.uint64(0o6060))]
+_ROTATION_TABLES = np.array([ROTATION_TABLES[rotation] for rotation in ROTATIONS], dtype=np.uint64)
+_OUTSIDE = [np.uint64(OUTSIDE_BLOCK_MASKS[block]) for block in range(4)]
+_ORIGINS = [np.uint64(BLOCK_ORIGINS[block]) for block in range(4)]
+
+
+def to_masks(grids):
+    """(N, 2) uint64 masks of (N, 6, 6) boards."""
+    cells = np.asarray(grids).reshape(-1, CELL_COUNT)
+    # the 36 bits of a mask packed in the first 5 of its 8 little endian bytes
+    packed = np.zeros((len(cells), 2, 8), dtype=np.uint8)
+    packed[:, 0, :5] = np.packbits(cells == FIRST, axis=1, bitorder='little')
+    packed[:, 1, :5] = np.packbits(cells == SECOND, axis=1, bitorder='little')
+    return packed.view('<u8').reshape(-1, 2).astype(np.uint64, copy=False)
+
+
+def to_grids(masks):
+    """(N, 6, 6) int8 boards of (N, 2) masks."""
+    masks = np.asarray(masks, dtype=np.uint64)
+    bits = (masks[:, :, None] & _CELL_BITS) != 0
+    grids = bits[:, 0].astype(np.int8) * FIRST + bits[:, 1].astype(np.int8) * SECOND
+    return grids.reshape(-1, 6, 6)
+
+
+def as_masks(boards):
+    """The masks of boards given in either form."""
+    boards = np.asarray(boards)
+    if boards.ndim == 3:
+        return to_masks(boards)
+    return boards.astype(np.uint64, copy=False)
+
+
+def has_lines(masks):
+    """Boolean array telling which of the masks have a line of five."""
+    found = np.zeros(masks.shape, dtype=bool)
+    for step, starts in _LINE_STARTS:
+        two = masks & masks >> step
+        four = two & two >> (step + step)
+        found |= (four & masks >> (step * np.uint64(4)) & starts) != 0
+    return found
+
+
+def winners(boards):
+    """int8 array with the winner of every board like masks_winner, TIE for full boards and NO_WINNER."""
+    masks = as_masks(boards)
+    first = has_lines(masks[:, 0])
+    second = has_lines(masks[:, 1])
+    results = np.full(len(masks), NO_WINNER, dtype=np.int8)
+    results[first] = 0
+    results[second] = 1
+    results[(first & second) | ((masks[:, 0] | masks[:, 1]) == _FULL)] = TIE
+    return results
+
+
+def block_patterns(masks, block):
+    """The 9 cells of the block in every mask packed as the bits 0-8, like block_pattern."""
+    shifted = masks >> _ORIGINS[block]
+    return (shifted & _SEVEN | shifted >> _THREE & _SECOND_ROW | shifted >> _SIX & _THIRD_ROW).astype(np.intp)
+
+
+def rotations(boards):
+    """(N, 8, 2) uint64 masks of every board after each of the ROTATIONS."""
+    masks = as_masks(boards)
+    # filled rotation by rotation, each one contiguous
+    successors = np.empty((len(ROTATIONS), len(masks), 2), dtype=np.uint64)
+    for block in range(4):
+        patterns = block_patterns(masks, block)
+        outside = masks & _OUTSIDE[block]
+        for index in (2 * block, 2 * block + 1):
+            np.bitwise_or(outside, _ROTATION_TABLES[index].take(patterns), out=successors[index])
+    return successors.transpose(1, 0, 2)
@@ -0,0 +1,62 @@
+#! /usr/bin/env python
+import random
+import unittest
+
+import pyntago
+
+try:
+    import numpy as np
+    import batch
+except ImportError:
+    batch = None
+
+
+def random_boards(count, seed=1):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        cells = rng.sample(range(pyntago.CELL_COUNT), rng.randint(0, pyntago.CELL_COUNT))
+        half = rng.randint(0, len(cells))
+        boards.append(pyntago.Bitboard(sum(1 << cell for cell in cells[:half]),
+                                       sum(1 << cell for cell in cells[half:])))
+    return boards
+
+
+@unittest.skipIf(batch is None, "NumPy is not installed")
+class BatchRules(unittest.TestCase):
+    def setUp(self):
+        self.boards = random_boards(500)
+        self.masks = np.array(self.boards, dtype=np.uint64)
+
+    def test_convert_between_grids_and_masks(self):
+        grids = batch.to_grids(self.masks)
+        self.assertEqual(grids.shape, (500, 6, 6))
+        for cell in range(pyntago.CELL_COUNT):
+            player = self.boards[7].player_at(cell)
+            self.assertEqual(grids[7, cell // 6, cell % 6], batch.EMPTY if player is None else player + 1)
+        np.testing.assert_array_equal(batch.to_masks(grids), self.masks)
+
+    def test_find_the_same_winners_as_the_bitboards(self):
+        expected = []
+        for board in self.boards:
+            if board.occupied() == pyntago.FULL_MASK:
+                expected.append(pyntago.TIE)
+            else:
+                result = pyntago.masks_winner(board.first, board.second)
+                expected.append(batch.NO_WINNER if result is None else result)
+        self.assertEqual(batch.winners(self.masks).tolist(), expected)
+        self.assertEqual(batch.winners(batch.to_grids(self.masks)).tolist(), expected)
+
+    def test_rotate_every_block_like_the_bitboards(self):
+        successors = batch.rotations(self.masks)
+        self.assertEqual(successors.shape, (500, 8, 2))
+        for board, rotated in zip(self.boards, successors.tolist()):
+            self.assertEqual(rotated, [list(board.rotate(block, direction)) for block, direction in batch.ROTATIONS])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
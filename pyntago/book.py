@@ -0,0 +1,191 @@
+#! /usr/bin/env python
+"""Pyntago: opening book with the best known move of the early positions.
+Positions are stored once per symmetry class by their canonical key, with the move for the canonical board.
+A book file is MAGIC, a byte with the number of plies covered and the records sorted by key. A record is the key as
+9 big endian bytes and the move as cell * 8 + block * 2 + 1 for right rotations in 2 bytes."""
+import argparse
+import multiprocessing
+import struct
+from collections import defaultdict
+
+from pyntago import DIRECTION_LEFT, DIRECTION_RIGHT, TIE, Bitboard, Move, count_bits
+from symmetry import canonical, canonical_key, from_canonical_move, to_canonical_move
+
+MAGIC = b'PYBK\x01'
+RECORD = struct.Struct('>9sH')
+
+_books = {}  # path -> OpeningBook loaded by book_agent in this process
+
+
+def move_code(move):
+    return move.cell * 8 + move.block * 2 + (move.direction == DIRECTION_RIGHT)
+
+
+def code_move(code):
+    return Move(code >> 3, code >> 1 & 3, DIRECTION_RIGHT if code & 1 else DIRECTION_LEFT)
+
+
+def side_board(own, other):
+    """The Bitboard of a position given as the masks of the player to move and of the opponent."""
+    return Bitboard(own, other) if count_bits(own | other) % 2 == 0 else Bitboard(other, own)
+
+
+class OpeningBook:
+    """Moves of the positions of the first plies, by canonical key."""
+
+    def __init__(self, moves=None, plies=0):
+        self.moves = moves if moves is not None else {}  # canonical key -> move on the canonical board
+        self.plies = plies
+
+    def __len__(self):
+        return len(self.moves)
+
+    def add(self, board, move):
+        """Adds the move of the player to move on the Bitboard, stored for its canonical board."""
+        canonical_board, transform = canonical(board)
+        self.moves[canonical_board.pack()] = to_canonical_move(move, transform)
+
+    def lookup(self, ply, own, other):
+        """The book move for the player to move at the ply, None if the ply or the position is not covered."""
+        if ply >= self.plies:
+            return None
+        canonical_board, transform = canonical(side_board(own, other))
+        move = self.moves.get(canonical_board.pack())
+        if move is None:
+            return None
+        return from_canonical_move(move, transform)
+
+    def save(self, path):
+        with open(path, 'wb') as stream:
+            stream.write(MAGIC + bytes((self.plies,)))
+            for key in sorted(self.moves):
+                stream.write(RECORD.pack(key.to_bytes(9, 'big'), move_code(self.moves[key])))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as stream:
+            data = stream.read()
+        if data[:len(MAGIC)] != MAGIC or (len(data) - len(MAGIC) - 1) % RECORD.size:
+            raise ValueError("Not an opening book: {}".format(path))
+        moves = {int.from_bytes(key, 'big'): code_move(code)
+                 for key, code in RECORD.iter_unpack(data[len(MAGIC) + 1:])}
+        return cls(moves, data[len(MAGIC)])
+
+
+class BookSearcher:
+    """Answers from the book for the plies it covers and asks the searcher for the rest.
+    Same interface as search.Searcher."""
+
+    def __init__(self, book, searcher):
+        self.book = book
+        self.searcher = searcher
+
+    def best_move(self, own, other):
+        move = self.book.lookup(count_bits(own | other), own, other)
+        if move is None:
+            move = self.searcher.best_move(own, other)
+        return move
+
+
+def book_agent(path, factory):
+    """A BookSearcher with the book in path in front of an agent made by the factory, for selfplay.
+    Books are loaded once per process and shared by all its agents."""
+    book = _books.get(path)
+    if book is None:
+        book = _books[path] = OpeningBook.load(path)
+    return BookSearcher(book, factory())
+
+
+def book_from_records(paths, plies, min_games=4):
+    """Book of the moves that scored best for the player making them in recorded games.
+    Moves are told apart by the canonical board they lead to, and only those played in min_games are considered."""
+    from record import read_games
+    # canonical key -> canonical key after the move -> [games, score, move, board]
+    stats = defaultdict(dict)
+    for path in paths:
+        with open(path, 'rb') as stream:
+            for game in read_games(stream):
+                if game.winner is None:
+                    continue  # unfinished
+                board = Bitboard(0, 0)
+                for ply, move in enumerate(game.moves[:plies]):
+                    side = ply % 2
+                    after, _ = board.play(move, side)
+                    score = 0.5 if game.winner == TIE else float(game.winner == side)
+                    entry = stats[canonical_key(board)].setdefault(canonical_key(after), [0, 0.0, move, board])
+                    entry[0] += 1
+                    entry[1] += score
+                    board = after
+    book = OpeningBook(plies=plies)
+    for choices in stats.values():
+        games, score, move, board = max(choices.values(), key=lambda entry: (entry[0] >= min_games,
+                                                                               entry[1] / entry[0], entry[0]))
+        if games >= min_games:
+            book.add(board, move)
+    return book
+
+
+def book_positions(plies):
+    """One Bitboard for every symmetry class of positions without winner reached in less than plies plies."""
+    positions = []
+    level = {canonical_key(Bitboard(0, 0)): Bitboard(0, 0)}
+    for ply in range(plies):
+        positions.extend(level.values())
+        if ply == plies - 1:
+            break
+        following = {}
+        for board in level.values():
+            for _, after, result in board.successors(ply % 2):
+                if result is None:
+                    following.setdefault(canonical_key(after), after)
+        level = following
+    return positions
+
+
+def _search_position(args):
+    packed, think_time = args
+    from search import Searcher
+    board = Bitboard.unpack(packed)
+    side = count_bits(board.occupied()) % 2
+    return packed, Searcher(think_time).best_move(board[side], board[1 - side])
+
+
+def book_from_search(plies, think_time, workers=1):
+    """Book of the moves found searching think_time seconds every position of the first plies."""
+    book = OpeningBook(plies=plies)
+    tasks = [(board.pack(), think_time) for board in book_positions(plies)]
+    if workers == 1:
+        for packed, move in map(_search_position, tasks):
+            book.add(Bitboard.unpack(packed), move)
+        return book
+    with multiprocessing.Pool(workers) as pool:
+        for packed, move in pool.imap_unordered(_search_position, tasks):
+            book.add(Bitboard.unpack(packed), move)
+    return book
+
+
+def main():
+    """Book tool: builds a book from game records or from searches."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+    records = commands.add_parser('records', help='best scoring moves of recorded games')
+    records.add_argument('book')
+    records.add_argument('records', nargs='+')
+    records.add_argument('--plies', type=int, default=8)
+    records.add_argument('--min-games', type=int, default=4, help='games a move needs to be considered')
+    searches = commands.add_parser('search', help='search every position of the first plies')
+    searches.add_argument('book')
+    searches.add_argument('--plies', type=int, default=3)
+    searches.add_argument('--think-time', type=float, default=1.0, help='seconds of search per position')
+    searches.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+    if args.command == 'records':
+        book = book_from_records(args.records, args.plies, args.min_games)
+    else:
+        book = book_from_search(args.plies, args.think_time, args.workers)
+    book.save(args.book)
+    print("{0} positions in {1}".format(len(book), args.book))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#! /usr/bin/env python
+import io
+import os
+import tempfile
+import unittest
+
+import book
+import pyntago
+import record
+import selfplay
+import symmetry
+
+
+class NoSearch:
+    def best_move(self, own, other):
+        raise AssertionError("searched a position of the book")
+
+
+class OpeningBooks(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.book = book.book_from_search(2, 0.05)
+
+    def test_cover_every_symmetry_class_of_the_first_plies(self):
+        self.assertEqual(len(self.book), 7)
+        for cell in range(pyntago.CELL_COUNT):
+            move = self.book.lookup(1, 0, 1 << cell)
+            self.assertIsNotNone(move)
+            pyntago.Bitboard(1 << cell, 0).play(move, 1)
+        self.assertIsNone(self.book.lookup(2, 0, 1 << 5 | 1 << 9))
+
+    def test_answer_for_the_symmetric_boards(self):
+        board = pyntago.Bitboard(1 << 8, 0)
+        move = self.book.lookup(1, 0, board.first)
+        expected = symmetry.canonical_key(board.play(move, 1)[0])
+        for transform in symmetry.TRANSFORMS:
+            turned = symmetry.transform_board(board, transform)
+            turned_move = self.book.lookup(1, turned.second, turned.first)
+            self.assertEqual(turned_move, symmetry.transform_move(move, transform))
+            self.assertEqual(symmetry.canonical_key(turned.play(turned_move, 1)[0]), expected)
+
+    def test_save_and_load(self):
+        descriptor, path = tempfile.mkstemp()
+        os.close(descriptor)
+        try:
+            self.book.save(path)
+            self.assertEqual(os.path.getsize(path), len(book.MAGIC) + 1 + 7 * book.RECORD.size)
+            loaded = book.OpeningBook.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual((loaded.moves, loaded.plies), (self.book.moves, self.book.plies))
+
+    def test_load_the_book_of_the_agents_once(self):
+        descriptor, path = tempfile.mkstemp()
+        os.close(descriptor)
+        try:
+            self.book.save(path)
+            first = book.book_agent(path, NoSearch)
+            second = book.book_agent(path, NoSearch)
+        finally:
+            os.remove(path)
+            book._books.pop(path, None)
+        self.assertIs(first.book, second.book)
+        self.assertIsNot(first.searcher, second.searcher)
+
+    def test_build_from_recorded_games(self):
+        stream = io.BytesIO()
+        writer = record.GameWriter(stream)
+        for seed in range(30):
+            game = selfplay.play_game([selfplay.RandomAgent(seed), selfplay.RandomAgent(seed + 100)])
+            writer.write(('random', 'random'), selfplay.result_side(game), game.moves)
+        descriptor, path = tempfile.mkstemp()
+        with os.fdopen(descriptor, 'wb') as recording:
+            recording.write(stream.getvalue())
+        try:
+            recorded = book.book_from_records([path], 4, min_games=1)
+        finally:
+            os.remove(path)
+        self.assertEqual(recorded.plies, 4)
+        self.assertIsNotNone(recorded.lookup(0, 0, 0))
+
+    def test_play_the_first_moves_of_a_computer_player(self):
+        manager = pyntago.EventManager()
+        game = pyntago.Game(manager)
+        computer = pyntago.ComputerPlayer(manager, game, 0, searcher=NoSearch(), book=self.book)
+        for _ in range(10):
+            manager.post(pyntago.CycleEvent())
+        self.assertEqual(game.move_count, 1)
+        self.assertEqual(computer.move, self.book.lookup(0, 0, 0))
+        searcher = book.BookSearcher(self.book, NoSearch())
+        self.assertEqual(searcher.best_move(0, 0), computer.move)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Pyntago: static evaluation of positions by the lines of five each player can still complete.
+A line scores the weight of the marbles a player has in it while the opponent has none. The search keeps the marble
+count of every line for both players along with the score, and updates them incrementally: a placement only changes
+the lines through its cell, and a rotation only the lines whose count changes, looked up for every block pattern.
+Weights are loaded from JSON files, to tune them with self play."""
+import json
+from collections import namedtuple
+
+from pyntago import (BLOCK_LINES, BLOCK_ORIGINS, CELL_LINES, ROTATION_DIRECTIONS, ROTATION_TABLES, WIN_LINES,
+                     block_pattern, count_bits)
+
+# Score of a line still open for a player, by the number of marbles the player has in it
+LINE_WEIGHTS = (0, 1, 4, 16, 64, 256)
+# Indexes in WIN_LINES of the lines through every cell
+CELL_LINE_INDEXES = [tuple(WIN_LINES.index(line) for line in lines) for lines in CELL_LINES]
+
+# score for the player with the own marbles and the marble counts of every line in WIN_LINES for each player
+LineState = namedtuple('LineState', 'score own_counts other_counts')
+
+
+def _block_mask(pattern, block):
+    """Mask with the 9 bit pattern in the block, the inverse of block_pattern(mask, block)."""
+    origin = BLOCK_ORIGINS[block]
+    return sum(1 << origin + i // 3 * 6 + i % 3 for i in range(9) if pattern >> i & 1)
+
+
+def _count_changes(block, direction, pattern):
+    """(line index, change) of the marble counts of the lines crossing the block that the rotation changes."""
+    before, after = _block_mask(pattern, block), ROTATION_TABLES[(block, direction)][pattern]
+    changes = ((WIN_LINES.index(line), count_bits(after & line) - count_bits(before & line))
+               for line in BLOCK_LINES[block])
+    return tuple((index, change) for index, change in changes if change)
+
+
+# (block, direction) -> the count changes of every block pattern of a player
+COUNT_CHANGES = {(block, direction): tuple(_count_changes(block, direction, pattern) for pattern in range(512))
+                 for block in range(4) for direction in ROTATION_DIRECTIONS}
+
+
+def line_counts(mask):
+    return [count_bits(mask & line) for line in WIN_LINES]
+
+
+def switch_sides(state):
+    """The state seen by the opponent."""
+    return LineState(-state.score, state.other_counts, state.own_counts)
+
+
+class Evaluator:
+    """Scores positions for the player with the own marbles, the opposite of the score for the opponent."""
+
+    def __init__(self, weights=LINE_WEIGHTS):
+        weights = tuple(weights)
+        if len(weights) != 6 or weights[0]:
+            raise ValueError("Expected 6 line weights starting with 0, got {}".format(weights))
+        self.weights = weights
+        # score of a line by the marbles of each player in it
+        self.values = [[weights[own] if not other else -weights[other] if not own else 0 for other in range(6)]
+                       for own in range(6)]
+
+    @classmethod
+    def load(cls, path):
+        """Evaluator with the weights of a JSON file holding a list of 6 numbers like LINE_WEIGHTS."""
+        with open(path) as stream:
+            return cls(json.load(stream))
+
+    def save(self, path):
+        with open(path, 'w') as stream:
+            json.dump(list(self.weights), stream)
+
+    def evaluate(self, own, other):
+        """Score of a position without winner."""
+        return self.state(own, other).score
+
+    def state(self, own, other):
+        """LineState of a position, counting the marbles of every line."""
+        own_counts, other_counts = line_counts(own), line_counts(other)
+        values = self.values
+        score = sum(values[own_count][other_count] for own_count, other_count in zip(own_counts, other_counts))
+        return LineState(score, own_counts, other_counts)
+
+    def place(self, state, cell):
+        """LineState after the own player places a marble in the empty cell."""
+        values = self.values
+        score, own_counts, other_counts = state
+        own_counts = own_counts[:]
+        for index in CELL_LINE_INDEXES[cell]:
+            own_count, other_count = own_counts[index], other_counts[index]
+            score += values[own_count + 1][other_count] - values[own_count][other_count]
+            own_counts[index] = own_count + 1
+        return LineState(score, own_counts, other_counts)
+
+    def rotate(self, state, own, other, block, direction):
+        """LineState after rotating the block, given the own and other marbles before the rotation."""
+        values = self.values
+        changes = COUNT_CHANGES[(block, direction)]
+        own_changes, other_changes = changes[block_pattern(own, block)], changes[block_pattern(other, block)]
+        score, own_counts, other_counts = state
+        if own_changes:
+            own_counts = own_counts[:]
+            for index, change in own_changes:
+                own_count, other_count = own_counts[index], other_counts[index]
+                score += values[own_count + change][other_count] - values[own_count][other_count]
+                own_counts[index] = own_count + change
+        if other_changes:
+            other_counts = other_counts[:]
+            for index, change in other_changes:
+                own_count, other_count = own_counts[index], other_counts[index]
+                score += values[own_count][other_count + change] - values[own_count][other_count]
+                other_counts[index] = other_count + change
+        return LineState(score, own_counts, other_counts)
@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+import os
+import random
+import tempfile
+import unittest
+
+import evaluation
+import pyntago
+import search
+
+
+def full_evaluation(own, other, weights=evaluation.LINE_WEIGHTS):
+    score = 0
+    for line in pyntago.WIN_LINES:
+        if not line & other:
+            score += weights[pyntago.count_bits(own & line)]
+        elif not line & own:
+            score -= weights[pyntago.count_bits(other & line)]
+    return score
+
+
+class IncrementalEvaluation(unittest.TestCase):
+    def test_updates_match_a_full_evaluation_in_random_games(self):
+        evaluator = evaluation.Evaluator((0, 1, 3, 9, 50, 200))
+        rng = random.Random(3)
+        for _ in range(40):
+            board, side = pyntago.Bitboard(0, 0), 0
+            lines = evaluator.state(0, 0)
+            while True:
+                move = rng.choice(board.moves(side))
+                own, other = board[side], board[1 - side]
+                placed = evaluator.place(lines, move.cell)
+                board, result = board.play(move, side)
+                if result is not None:
+                    break
+                lines = evaluator.rotate(placed, own | 1 << move.cell, other, move.block, move.direction)
+                self.assertEqual(lines, evaluator.state(board[side], board[1 - side]))
+                self.assertEqual(lines.score, full_evaluation(board[side], board[1 - side], evaluator.weights))
+                lines = evaluation.switch_sides(lines)
+                side = 1 - side
+
+    def test_scores_are_opposite_for_the_opponent(self):
+        evaluator = evaluation.Evaluator()
+        own = sum(1 << pyntago.cell_index(pyntago.Position(x, 0)) for x in range(3))
+        other = 1 << pyntago.cell_index(pyntago.Position(3, 3))
+        self.assertGreater(evaluator.evaluate(own, other), 0)
+        self.assertEqual(evaluator.evaluate(own, other), -evaluator.evaluate(other, own))
+
+
+class Weights(unittest.TestCase):
+    def test_load_saved_weights(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.json')
+            evaluation.Evaluator((0, 2, 5, 20, 90, 400)).save(path)
+            self.assertEqual(evaluation.Evaluator.load(path).weights, (0, 2, 5, 20, 90, 400))
+
+    def test_reject_invalid_weights(self):
+        self.assertRaises(ValueError, evaluation.Evaluator, (1, 1, 4, 16, 64, 256))
+        self.assertRaises(ValueError, evaluation.Evaluator, (0, 1, 4))
+
+    def test_search_with_other_weights(self):
+        # own: 3 marbles in the top row, other: 3 marbles in the third row
+        own = sum(1 << pyntago.cell_index(pyntago.Position(x, 0)) for x in range(3))
+        other = sum(1 << pyntago.cell_index(pyntago.Position(x, 2)) for x in range(3))
+        evaluator = evaluation.Evaluator((0, 0, 0, 0, 0, 0))
+        searcher = search.Searcher(time_budget=10.0, max_depth=1, evaluator=evaluator)
+        searcher.best_move(own, other)
+        self.assertEqual(searcher.score, 0)
+        searcher = search.Searcher(time_budget=10.0, max_depth=1)
+        searcher.best_move(own, other)
+        self.assertGreater(searcher.score, 0)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
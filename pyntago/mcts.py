@@ -0,0 +1,149 @@
+"""Pyntago: Monte Carlo tree search (UCT) with random playouts run in parallel processes.
+Every worker grows its own tree from the root and the visits of the root moves are added up."""
+import math
+import multiprocessing
+import random
+import time
+
+from pyntago import CELL_COUNT, ROTATION_DIRECTIONS, TIE, Bitboard, Move, count_bits
+
+EXPLORATION = math.sqrt(2)
+
+
+class Node:
+    """Position in the tree; the score counts the playouts won by the player who moved into it."""
+    __slots__ = ('board', 'side', 'move', 'parent', 'children', 'untried', 'result', 'visits', 'score')
+
+    def __init__(self, board, side, move=None, parent=None, result=None):
+        self.board = board
+        self.side = side
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.result = result
+        if result is None:
+            self.untried = board.moves(side)
+        else:
+            self.untried = []
+        self.visits = 0
+        self.score = 0.0
+
+    def select_child(self):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: child.score / child.visits +
+                   EXPLORATION * math.sqrt(log_visits / child.visits))
+
+    def expand(self, rng):
+        move = self.untried.pop(rng.randrange(len(self.untried)))
+        board, result = self.board.play(move, self.side)
+        child = Node(board, 1 - self.side, move, self, result)
+        if result == self.side:
+            # a proven win is the only move worth playing here
+            self.children = [child]
+            self.untried = []
+        else:
+            self.children.append(child)
+        return child
+
+
+def winning_move(board, side):
+    """A move that wins at once for the side, None if there is none."""
+    for move, _, result in board.successors(side):
+        if result == side:
+            return move
+    return None
+
+
+def playout(board, side, rng):
+    """Plays random moves until the game ends and returns the index of the winner or TIE."""
+    while True:
+        occupied = board.first | board.second
+        empty = [cell for cell in range(CELL_COUNT) if not occupied >> cell & 1]
+        move = Move(rng.choice(empty), rng.randrange(4), rng.choice(ROTATION_DIRECTIONS))
+        board, result = board.play(move, side)
+        if result is not None:
+            return result
+        side = 1 - side
+
+
+def grow_tree(packed, side, time_budget, max_playouts=None, seed=None):
+    """Runs playouts from the packed board for the time budget.
+    Returns the number of playouts and the (move, visits, score) of every root move."""
+    rng = random.Random(seed)
+    root = Node(Bitboard.unpack(packed), side)
+    deadline = time.perf_counter() + time_budget
+    playouts = 0
+    while time.perf_counter() < deadline and (max_playouts is None or playouts < max_playouts):
+        node = root
+        while not node.untried and node.children:
+            node = node.select_child()
+        if node.untried:
+            node = node.expand(rng)
+        result = node.result if node.result is not None else playout(node.board, node.side, rng)
+        while node is not None:
+            node.visits += 1
+            if result == TIE:
+                node.score += 0.5
+            elif result != node.side:
+                node.score += 1
+            node = node.parent
+        playouts += 1
+    return playouts, [(child.move, child.visits, child.score) for child in root.children]
+
+
+def _grow_tree(args):
+    return grow_tree(*args)
+
+
+class MonteCarloSearcher:
+    """Finds the most visited move within a time budget in seconds using a pool of worker processes.
+    Same interface as search.Searcher: positions are the masks of the player to move and of the opponent."""
+
+    def __init__(self, time_budget=1.0, workers=None, max_playouts=None):
+        self.time_budget = time_budget
+        self.workers = workers if workers is not None else multiprocessing.cpu_count()
+        self.max_playouts = max_playouts
+        self.pool = None
+        self.playouts = 0
+        self.elapsed = 0.0
+        self.stats = {}
+
+    @property
+    def playouts_per_second(self):
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+    def best_move(self, own, other):
+        start = time.perf_counter()
+        side = count_bits(own | other) % 2
+        board = Bitboard(own, other) if side == 0 else Bitboard(other, own)
+        self.stats = {}
+        self.playouts = 0
+        move = winning_move(board, side)
+        if move is not None:
+            # the visits of a win among all the root moves would only stand out by chance
+            self.elapsed = time.perf_counter() - start
+            return move
+        seed = random.getrandbits(32)
+        tasks = [(board.pack(), side, self.time_budget, self.max_playouts, seed + worker)
+                 for worker in range(self.workers)]
+        if self.workers > 1:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.workers)
+            results = self.pool.map(_grow_tree, tasks)
+        else:
+            results = [_grow_tree(tasks[0])]
+        for playouts, moves in results:
+            self.playouts += playouts
+            for move, visits, score in moves:
+                total_visits, total_score = self.stats.get(move, (0, 0.0))
+                self.stats[move] = (total_visits + visits, total_score + score)
+        self.elapsed = time.perf_counter() - start
+        if not self.stats:
+            return board.moves(side)[0]  # no playout finished in time
+        return max(self.stats, key=lambda move: self.stats[move])
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
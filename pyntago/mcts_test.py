@@ -0,0 +1,64 @@
+#! /usr/bin/env python
+import random
+import unittest
+
+import mcts
+import pyntago
+
+
+class RandomPlayouts(unittest.TestCase):
+    def test_end_with_a_result(self):
+        rng = random.Random(1)
+        for _ in range(20):
+            self.assertIn(mcts.playout(pyntago.Bitboard(0, 0), 0, rng), (0, 1, pyntago.TIE))
+
+    def test_grow_a_tree_with_every_root_move_visited(self):
+        playouts, moves = mcts.grow_tree(pyntago.Bitboard(0, 0).pack(), 0, 10.0, max_playouts=200, seed=1)
+        self.assertEqual(playouts, 200)
+        self.assertEqual(len(moves), len(pyntago.Bitboard(0, 0).moves(0)))
+        self.assertEqual(sum(visits for _, visits, _ in moves), 200)
+
+
+class AlmostFinishedRowMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        self.own = sum(1 << pyntago.cell_index(pyntago.Position(x, 0)) for x in range(4))
+        self.other = sum(1 << pyntago.cell_index(pyntago.Position(x, 2)) for x in range(3)) | 1 << 30
+
+    def test_completes_the_row_merging_two_workers(self):
+        searcher = mcts.MonteCarloSearcher(time_budget=60.0, workers=2, max_playouts=50)
+        try:
+            move = searcher.best_move(self.own, self.other)
+        finally:
+            searcher.close()
+        self.assertEqual(move.cell, pyntago.cell_index(pyntago.Position(4, 0)))
+
+    def test_keeps_only_the_win_once_it_is_found_in_the_tree(self):
+        board = pyntago.Bitboard(self.own, self.other)
+        playouts, moves = mcts.grow_tree(board.pack(), 0, 60.0, max_playouts=300, seed=1)
+        self.assertEqual(playouts, 300)
+        self.assertEqual([move.cell for move, _, _ in moves], [pyntago.cell_index(pyntago.Position(4, 0))])
+
+    def test_merges_the_visits_of_two_workers(self):
+        searcher = mcts.MonteCarloSearcher(time_budget=60.0, workers=2, max_playouts=50)
+        try:
+            move = searcher.best_move(self.other, self.own | 1 << 35)
+        finally:
+            searcher.close()
+        self.assertEqual(searcher.playouts, 100)
+        self.assertEqual(sum(visits for visits, _ in searcher.stats.values()), 100)
+        self.assertIn(move, searcher.stats)
+        self.assertGreater(searcher.playouts_per_second, 0)
+
+    def test_answers_without_any_playout(self):
+        searcher = mcts.MonteCarloSearcher(time_budget=0.0, workers=1)
+        move = searcher.best_move(0, 0)
+        self.assertEqual(searcher.playouts, 0)
+        self.assertIn(move, pyntago.Bitboard(0, 0).moves(0))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
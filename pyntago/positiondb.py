@@ -0,0 +1,215 @@
+#! /usr/bin/env python
+"""Pyntago: memory mapped database of evaluated positions.
+A database file is MAGIC followed by records sorted by key. A record is the key as 9 big endian bytes (a packed
+board, canonical unless told otherwise), the result for the player to move (WIN, DRAW or LOSS) and the depth in plies
+that proved it. Readers map the file read only, so any number of processes share the pages of the operating system."""
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from collections import namedtuple
+
+from pyntago import CELL_COUNT, Bitboard, count_bits
+from symmetry import canonical_key
+
+MAGIC = b'PYDB\x01'
+RECORD = struct.Struct('>9sbB')
+KEY_SIZE = 9
+WIN, DRAW, LOSS = 1, 0, -1
+
+Evaluation = namedtuple('Evaluation', 'result depth')
+
+
+def key_bytes(key):
+    return key.to_bytes(KEY_SIZE, 'big')
+
+
+class PositionDatabase:
+    """Read only access to a database file, looking up keys with a binary search on the mapped records."""
+
+    def __init__(self, path, canonical=True):
+        self.canonical = canonical
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC or (len(self.map) - len(MAGIC)) % RECORD.size:
+            self.close()
+            raise ValueError("Not a position database: {}".format(path))
+        self.count = (len(self.map) - len(MAGIC)) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            key, result, depth = RECORD.unpack_from(self.map, len(MAGIC) + index * RECORD.size)
+            yield int.from_bytes(key, 'big'), Evaluation(result, depth)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def lookup(self, board):
+        """Evaluation of the Bitboard for the player to move, None if it is not in the database."""
+        return self.lookup_key(canonical_key(board) if self.canonical else board.pack())
+
+    def lookup_key(self, key):
+        wanted = key_bytes(key)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = len(MAGIC) + middle * RECORD.size
+            found = self.map[offset:offset + KEY_SIZE]
+            if found < wanted:
+                low = middle + 1
+            elif found > wanted:
+                high = middle
+            else:
+                _, result, depth = RECORD.unpack_from(self.map, offset)
+                return Evaluation(result, depth)
+        return None
+
+
+def read_records(path, chunk_records=4096):
+    """Yields the (key bytes, result, depth) records of a database or run file in order, a chunk at a time."""
+    with open(path, 'rb') as stream:
+        if stream.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a position database: {}".format(path))
+        while True:
+            chunk = stream.read(chunk_records * RECORD.size)
+            if len(chunk) % RECORD.size:
+                raise ValueError("Truncated position database: {}".format(path))
+            if not chunk:
+                return
+            for record in RECORD.iter_unpack(chunk):
+                yield record
+
+
+def write_records(path, records):
+    """Writes sorted records, keeping only the deepest evaluation of each key. Returns how many were written."""
+    count = 0
+    last = None
+    with open(path, 'wb') as stream:
+        stream.write(MAGIC)
+        for record in records:
+            if last is not None and record[0] == last[0]:
+                if record[2] > last[2]:
+                    last = record
+                continue
+            if last is not None:
+                stream.write(RECORD.pack(*last))
+                count += 1
+            last = record
+        if last is not None:
+            stream.write(RECORD.pack(*last))
+            count += 1
+    return count
+
+
+def write_run(path, evaluations):
+    """Writes a dict of key -> Evaluation as a sorted run."""
+    return write_records(path, sorted((key_bytes(key), result, depth)
+                                      for key, (result, depth) in evaluations.items()))
+
+
+def merge(paths, path):
+    """Merges sorted runs or databases into a new database file at path."""
+    return write_records(path, heapq.merge(*[read_records(run) for run in paths]))
+
+
+def build(path, evaluations, run_size=1 << 20):
+    """Builds a database from an iterable of (key, Evaluation) of any size.
+    Up to run_size evaluations are kept in memory, sorted into temporary runs that are merged at the end."""
+    directory = os.path.dirname(os.path.abspath(path))
+    runs = []
+    pending = {}
+
+    def flush():
+        descriptor, run = tempfile.mkstemp(suffix='.run', dir=directory)
+        os.close(descriptor)
+        runs.append(run)
+        write_run(run, pending)
+        pending.clear()
+
+    try:
+        for key, evaluation in evaluations:
+            known = pending.get(key)
+            if known is None or evaluation.depth > known.depth:
+                pending[key] = evaluation
+            if len(pending) >= run_size:
+                flush()
+        if pending or not runs:
+            flush()
+        return merge(runs, path)
+    finally:
+        for run in runs:
+            os.remove(run)
+
+
+def evaluate_position(board, searcher):
+    """Evaluation of the Bitboard for the player to move if the searcher solves it, None otherwise.
+    Only completed iterations prove anything, so the score of an interrupted first one is ignored."""
+    from search import WIN_SCORE
+    side = count_bits(board.occupied()) % 2
+    searcher.best_move(board[side], board[1 - side])
+    empty_cells = CELL_COUNT - count_bits(board.occupied())
+    if searcher.depth == 0:
+        return None  # not even the first iteration finished
+    elif searcher.score >= WIN_SCORE - CELL_COUNT:
+        return Evaluation(WIN, searcher.depth)
+    elif searcher.score <= CELL_COUNT - WIN_SCORE:
+        return Evaluation(LOSS, searcher.depth)
+    elif searcher.depth == empty_cells:
+        return Evaluation(DRAW, searcher.depth)
+    return None
+
+
+def recorded_evaluations(paths, plies, searcher):
+    """Yields the evaluations of the positions solved among the last plies of every recorded game."""
+    from record import read_games
+    for path in paths:
+        with open(path, 'rb') as stream:
+            for game in read_games(stream):
+                board = Bitboard(0, 0)
+                positions = []
+                for ply, move in enumerate(game.moves):
+                    positions.append(board)
+                    board, _ = board.play(move, ply % 2)
+                for position in positions[-plies:]:
+                    evaluation = evaluate_position(position, searcher)
+                    if evaluation is not None:
+                        yield canonical_key(position), evaluation
+
+
+def main():
+    """Database tool: builds a database from game records or merges databases."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    commands = parser.add_subparsers(dest='command', required=True)
+    builder = commands.add_parser('build', help='solve the last positions of recorded games')
+    builder.add_argument('database')
+    builder.add_argument('records', nargs='+')
+    builder.add_argument('--plies', type=int, default=6, help='positions to solve at the end of every game')
+    builder.add_argument('--think-time', type=float, default=1.0, help='seconds of search per position')
+    builder.add_argument('--run-size', type=int, default=1 << 20, help='evaluations per sorted run')
+    merger = commands.add_parser('merge', help='merge databases, keeping the deepest evaluations')
+    merger.add_argument('database')
+    merger.add_argument('sources', nargs='+')
+    args = parser.parse_args()
+    if args.command == 'build':
+        from search import Searcher
+        evaluations = recorded_evaluations(args.records, args.plies, Searcher(args.think_time))
+        count = build(args.database, evaluations, args.run_size)
+    else:
+        count = merge(args.sources, args.database)
+    print("{0} positions in {1}".format(count, args.database))
+
+
+if __name__ == '__main__':
+    main()
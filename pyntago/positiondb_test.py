@@ -0,0 +1,79 @@
+#! /usr/bin/env python
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+import positiondb
+import pyntago
+import symmetry
+from search import Searcher
+
+
+def _lookup(args):
+    path, keys = args
+    with positiondb.PositionDatabase(path) as database:
+        return [database.lookup_key(key) for key in keys]
+
+
+class PositionDatabases(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'positions.db')
+        self.evaluations = [(key * 7919, positiondb.Evaluation(key % 3 - 1, key % 5)) for key in range(1000)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build_from_merged_runs(self):
+        deeper = (0, positiondb.Evaluation(positiondb.WIN, 9))
+        self.assertEqual(positiondb.build(self.path, self.evaluations[::-1] + [deeper], run_size=64), 1000)
+        self.assertEqual(os.listdir(self.directory), ['positions.db'])
+        with positiondb.PositionDatabase(self.path) as database:
+            self.assertEqual(len(database), 1000)
+            self.assertEqual(database.lookup_key(0), deeper[1])
+            self.assertEqual(database.lookup_key(500 * 7919), self.evaluations[500][1])
+            self.assertIsNone(database.lookup_key(500 * 7919 + 1))
+            self.assertEqual([key for key, _ in database], sorted(key for key, _ in self.evaluations))
+
+    def test_merge_databases(self):
+        first, second = os.path.join(self.directory, 'first.db'), os.path.join(self.directory, 'second.db')
+        positiondb.build(first, self.evaluations[:600])
+        positiondb.build(second, self.evaluations[400:])
+        self.assertEqual(positiondb.merge([first, second], self.path), 1000)
+
+    def test_share_the_database_between_reader_processes(self):
+        positiondb.build(self.path, self.evaluations)
+        keys = [key for key, _ in self.evaluations]
+        with multiprocessing.Pool(2) as pool:
+            found = pool.map(_lookup, [(self.path, keys[:500]), (self.path, keys[500:])])
+        self.assertEqual(found[0] + found[1], [evaluation for _, evaluation in self.evaluations])
+
+    def test_look_up_symmetric_boards_by_their_canonical_key(self):
+        own = sum(1 << pyntago.cell_index(pyntago.Position(x, 0)) for x in range(4))
+        other = sum(1 << pyntago.cell_index(pyntago.Position(x, 2)) for x in range(4))
+        board = pyntago.Bitboard(own, other)
+        evaluation = positiondb.evaluate_position(board, Searcher(time_budget=5.0))
+        self.assertEqual(evaluation, positiondb.Evaluation(positiondb.WIN, 1))
+        positiondb.build(self.path, [(symmetry.canonical_key(board), evaluation)])
+        with positiondb.PositionDatabase(self.path) as database:
+            self.assertEqual(database.lookup(symmetry.transform_board(board, 5)), evaluation)
+            self.assertIsNone(database.lookup(pyntago.Bitboard(own, 0)))
+
+    def test_ignore_searches_interrupted_in_the_first_iteration(self):
+        own = sum(1 << pyntago.cell_index(pyntago.Position(x, 0)) for x in range(4))
+        other = sum(1 << pyntago.cell_index(pyntago.Position(x, 2)) for x in range(4))
+        searcher = Searcher(time_budget=5.0)
+        self.assertIsNotNone(positiondb.evaluate_position(pyntago.Bitboard(own, other), searcher))
+        searcher.time_budget = 0
+        self.assertIsNone(positiondb.evaluate_position(pyntago.Bitboard(1 << 14, 1 << 15), searcher))
+        self.assertEqual(searcher.score, 0)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,47 @@
 #! /usr/bin/env python
 """Pyntago: A pentago board in python."""
-import math
-import os
-from collections import namedtuple
+import json
+import logging
+import time
+from collections import deque, namedtuple
 
-import pygame
-from pygame.locals import *
+logger = logging.getLogger('pyntago')
 
 
-def debug(msg):
-    print(msg)
+class EventLogFormatter(logging.Formatter):
+    """Formats event records as JSON lines with their time, event type and payload."""
+
+    def format(self, record):
+        data = {'time': record.created, 'level': record.levelname}
+        if hasattr(record, 'event_type'):
+            data['event'] = record.event_type
+            data['payload'] = record.payload
+        else:
+            data['message'] = record.getMessage()
+        return json.dumps(data, default=repr)
+
+
+class EventLog:
+    """Writes the log records as JSON lines to the stream from a background thread.
+    Posting an event only queues its record; stop() writes the pending ones and detaches the log."""
+
+    def __init__(self, stream, level=logging.DEBUG):
+        import logging.handlers
+        import queue
+        records = queue.Queue()
+        writer = logging.StreamHandler(stream)
+        writer.setFormatter(EventLogFormatter())
+        self.listener = logging.handlers.QueueListener(records, writer)
+        self.handler = logging.handlers.QueueHandler(records)
+        self.previous_level = logger.level
+        logger.addHandler(self.handler)
+        logger.setLevel(level)
+        self.listener.start()
+
+    def stop(self):
+        logger.removeHandler(self.handler)
+        logger.setLevel(self.previous_level)
+        self.listener.stop()
 
 
 DIRECTION_UP = 0
@@ -24,6 +56,17 @@ COLOR_BLACK = (0, 0, 0)
 COLOR_WHITE = (255, 255, 255)
 COLOR_GREEN = (0, 255, 0)
 
+# Rendering and input need pygame, they are loaded from the view module on first use
+_VIEW_NAMES = {'KeyboardController', 'BlockCursorSprite', 'PositionCursorSprite', 'DirectionCursorSprite',
+               'BlockSprite', 'MessageSprite', 'PygameView', 'degrees_to_radians'}
+
+
+def __getattr__(name):
+    if name in _VIEW_NAMES:
+        import view
+        return getattr(view, name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
 
 class Event:
     """Superclass for any event."""
@@ -31,6 +74,24 @@ class Event:
     def __init__(self):
         self.name = "Generic event"
 
+    def coalesce_key(self):
+        """Events with the same key in a batch of queued events are redundant: only the last one is kept."""
+        return None
+
+    def payload(self):
+        """Plain values of the event for logging, including the plain attributes of its models."""
+        data = {}
+        for key, value in vars(self).items():
+            if key == 'name':
+                continue
+            if isinstance(value, (int, float, str, tuple)) or value is None:
+                data[key] = value
+            else:
+                for attribute, attribute_value in vars(value).items():
+                    if isinstance(attribute_value, (int, float, str, tuple)) or attribute_value is None:
+                        data[key + '.' + attribute] = attribute_value
+        return data
+
 
 class CycleEvent(Event):
     def __init__(self):
@@ -79,6 +140,9 @@ class BlockCursorMoveEvent(Event):
         self.name = "Move block cursor event"
         self.block_cursor = block_cursor
 
+    def coalesce_key(self):
+        return self.__class__, id(self.block_cursor)
+
 
 class BlockCursorSelectEvent(Event):
     def __init__(self, block_cursor):
@@ -116,6 +180,9 @@ class PositionCursorMoveEvent(Event):
         self.name = "Move position cursor event"
         self.position_cursor = position_cursor
 
+    def coalesce_key(self):
+        return self.__class__, id(self.position_cursor)
+
 
 class SelectPositionCursorEvent(Event):
     def __init__(self, position_cursor):
@@ -153,6 +220,9 @@ class DirectionCursorMoveEvent(Event):
         self.name = "Move direction cursor event"
         self.direction_cursor = direction_cursor
 
+    def coalesce_key(self):
+        return self.__class__, id(self.direction_cursor)
+
 
 class DirectionCursorSelectEvent(Event):
     def __init__(self, direction_cursor):
@@ -202,386 +272,198 @@ class GameMessageUpdateEvent(Event):
         self.name = "Message update event"
         self.game = game
 
+    def coalesce_key(self):
+        return self.__class__, id(self.game)
 
-class EventManager:
-    """"Coordinates communication between Models, Views and Controllers."""
-
-    def __init__(self):
-        from weakref import WeakKeyDictionary
-        self.listeners = WeakKeyDictionary()
-        self.eventQueue = []
 
-    def register_listener(self, listener):
-        self.listeners[listener] = 1
+class EventManager:
+    """"Coordinates communication between Models, Views and Controllers.
+    Listeners subscribe handlers to event classes; an event reaches the handlers of its class and of its
+    superclasses, in the order they were registered. Handlers are weak references to bound methods, so
+    registering does not keep a listener alive.
+    When queued, posted events wait in a queue that each cycle event drains in batches: the events
+    posted while a batch is dispatched form the next batch, so handlers never run inside other handlers."""
+
+    def __init__(self, queued=False):
+        self.subscriptions = {}  # event class -> [(registration order, WeakMethod)]
+        self.dispatch_table = {}  # event class -> handler references for it, built on first post
+        self.registrations = 0
+        self.posted = 0  # events other than cycles, tells the cycle controller that something is going on
+        self.queued = queued
+        self.eventQueue = deque()
+        self.draining = False
+        self.coalesced = 0
+
+    def register_listener(self, listener, handlers=None):
+        """Subscribes handlers, a dict of event class -> bound method of the listener taking the event.
+        Without handlers the notify method of the listener gets every event."""
+        from weakref import WeakMethod
+        if handlers is None:
+            handlers = {Event: listener.notify}
+        for event_class, handler in handlers.items():
+            self.registrations += 1
+            reference = WeakMethod(handler, self._forget)
+            self.subscriptions.setdefault(event_class, []).append((self.registrations, reference))
+        self.dispatch_table.clear()
 
     def deregister_listener(self, listener):
-        if listener in self.listeners:
-            del self.listeners[listener]
+        for event_class, subscriptions in self.subscriptions.items():
+            subscriptions[:] = [(order, reference) for order, reference in subscriptions
+                                if reference() is not None and reference().__self__ is not listener]
+        self.dispatch_table.clear()
+
+    def _forget(self, dead_reference):
+        for subscriptions in self.subscriptions.values():
+            subscriptions[:] = [(order, reference) for order, reference in subscriptions
+                                if reference is not dead_reference]
+        self.dispatch_table.clear()
+
+    def _handlers(self, event_class):
+        subscriptions = []
+        for cls in event_class.__mro__:
+            subscriptions.extend(self.subscriptions.get(cls, ()))
+        handlers = tuple(reference for order, reference in sorted(subscriptions, key=lambda s: s[0]))
+        self.dispatch_table[event_class] = handlers
+        return handlers
 
     def post(self, event):
-        if not isinstance(event, CycleEvent):
-            debug("Event: " + event.name)
-        for listener in self.listeners:
-            listener.notify(event)
-
-
-class KeyboardController:
-    """Takes pygame events from the keyboard to control the model."""
-
-    def __init__(self, event_manager):
+        if event.__class__ is not CycleEvent:
+            self.posted += 1
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Event: %s", event.name,
+                             extra={'event_type': event.__class__.__name__, 'payload': event.payload()})
+        if not self.queued:
+            self.dispatch(event)
+            return
+        self.eventQueue.append(event)
+        if event.__class__ is CycleEvent and not self.draining:
+            self.drain()
+
+    def drain(self):
+        self.draining = True
+        try:
+            while self.eventQueue:
+                batch = self.coalesce(self.eventQueue)
+                self.eventQueue = deque()
+                for event in batch:
+                    self.dispatch(event)
+        finally:
+            self.draining = False
+
+    def coalesce(self, events):
+        last = {}
+        for index, event in enumerate(events):
+            key = event.coalesce_key()
+            if key is not None:
+                last[key] = index
+        batch = [event for index, event in enumerate(events)
+                 if event.coalesce_key() is None or last[event.coalesce_key()] == index]
+        self.coalesced += len(events) - len(batch)
+        return batch
+
+    def dispatch(self, event):
+        handlers = self.dispatch_table.get(event.__class__)
+        if handlers is None:
+            handlers = self._handlers(event.__class__)
+        for reference in handlers:
+            handler = reference()
+            if handler is not None:
+                handler(event)
+
+
+class ComputerPlayer:
+    """Plays one side of the game by driving the cursors with the moves found by a search.
+    With an opening book, the moves of the plies it covers come from the book."""
+
+    def __init__(self, event_manager, game, player_index, time_budget=2.0, searcher=None, book=None):
         self.manager = event_manager
-        self.manager.register_listener(self)
-
-    def notify(self, event):
-        if isinstance(event, CycleEvent):
-            for input_event in pygame.event.get():
-                new_event = None
-                if input_event.type == QUIT:
-                    new_event = RequestQuitEvent()
-                elif input_event.type == KEYDOWN:
-                    if input_event.key == K_ESCAPE:
-                        new_event = RequestQuitEvent()
-                    elif input_event.key == K_UP or input_event.key == K_w:
-                        new_event = RequestMoveEvent(DIRECTION_UP)
-                    elif input_event.key == K_DOWN or input_event.key == K_s:
-                        new_event = RequestMoveEvent(DIRECTION_DOWN)
-                    elif input_event.key == K_LEFT or input_event.key == K_a:
-                        new_event = RequestMoveEvent(DIRECTION_LEFT)
-                    elif input_event.key == K_RIGHT or input_event.key == K_d:
-                        new_event = RequestMoveEvent(DIRECTION_RIGHT)
-                    elif input_event.key == K_RETURN:
-                        new_event = RequestSelectEvent()
-                if new_event:
-                    self.manager.post(new_event)
+        self.manager.register_listener(self, {CycleEvent: self.on_cycle})
+        self.game = game
+        self.player_index = player_index
+        if searcher is None:
+            from search import Searcher
+            searcher = Searcher(time_budget)
+        self.searcher = searcher
+        self.book = book
+        self.move = None
+
+    def on_cycle(self, event):
+        game = self.game
+        if game.current_player != game.players[self.player_index]:
+            return
+        if game.state == Game.STATE_MOVE and game.position_cursor.state == PositionCursor.STATE_ACTIVE:
+            bitboard = Bitboard.from_dict(game.board, game.players)
+            own, other = bitboard[self.player_index], bitboard[1 - self.player_index]
+            self.move = self.book.lookup(game.move_count, own, other) if self.book else None
+            if self.move is None:
+                self.move = self.searcher.best_move(own, other)
+            game.position_cursor.position = cell_position(self.move.cell)
+            self.manager.post(PositionCursorMoveEvent(game.position_cursor))
+            game.position_cursor.select()
+        elif game.state == Game.STATE_SELECT and game.block_cursor.state == BlockCursor.STATE_ACTIVE:
+            game.block_cursor.block = self.move.block
+            self.manager.post(BlockCursorMoveEvent(game.block_cursor))
+            game.block_cursor.select()
+        elif game.state == Game.STATE_ROTATE and game.direction_cursor.state == DirectionCursor.STATE_ACTIVE:
+            game.direction_cursor.move(self.move.direction)
+            game.direction_cursor.select()
 
 
 class CycleController:
-    """Controls the CPU (animation) cycle."""
+    """Controls the CPU (animation) cycle.
+    Cycles run at most fps times per second while they keep posting events. After idle_delay seconds
+    without events the loop calls idle_wait(idle_timeout), which should block until there is input."""
 
-    def __init__(self, event_manager):
+    def __init__(self, event_manager, fps=60, idle_wait=time.sleep, idle_delay=0.5, idle_timeout=0.5):
         self.manager = event_manager
-        self.manager.register_listener(self)
+        self.manager.register_listener(self, {RequestQuitEvent: self.on_quit_request})
         self.alive = True
+        self.fps = fps
+        self.idle_wait = idle_wait
+        self.idle_delay = idle_delay
+        self.idle_timeout = idle_timeout
+        self.frames = 0
+        self.idle_waits = 0
+        self.started = None
+        self.frame_times = deque(maxlen=120)  # seconds spent in the last cycles
 
     def run(self):
+        frame_duration = 1.0 / self.fps
+        self.started = last_activity = time.perf_counter()
         while self.alive:
+            start = time.perf_counter()
+            posted = self.manager.posted
             self.manager.post(CycleEvent())
-
-    def notify(self, event):
+            end = time.perf_counter()
+            self.frames += 1
+            self.frame_times.append(end - start)
+            if self.manager.posted != posted:
+                last_activity = end
+            if end - last_activity > self.idle_delay:
+                self.idle_waits += 1
+                self.idle_wait(self.idle_timeout)
+            elif end - start < frame_duration:
+                time.sleep(frame_duration - (end - start))
+
+    def frame_stats(self):
+        """Cycles run, their rate and the average and maximum seconds spent in the last ones."""
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0
+        times = self.frame_times
+        return {'frames': self.frames,
+                'idle_waits': self.idle_waits,
+                'fps': self.frames / elapsed if elapsed else 0.0,
+                'average_frame_time': sum(times) / len(times) if times else 0.0,
+                'max_frame_time': max(times) if times else 0.0}
+
+    def on_quit_request(self, event):
         # todo: should be quit event when/if there is a confirmation dialog
-        if isinstance(event, RequestQuitEvent):
-            # stop the loop
-            self.alive = False
-
-
-class BlockCursorSprite(pygame.sprite.Sprite):
-    def __init__(self, group=None):
-        if group is not None:
-            pygame.sprite.Sprite.__init__(self, group)
-        else:
-            pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface((300, 300))
-        self.image = self.image.convert_alpha()
-        self.image.fill(COLOR_TRANSPARENT)
-        self.color = COLOR_GREEN
-        self.last_color = self.color
-        pygame.draw.rect(self.image, self.color, (10, 10, 280, 280), 3)
-        self.rect = self.image.get_rect()
-        self.move_to = None
-
-    def update(self):
-        if self.move_to:
-            self.rect.center = self.move_to
-            self.move_to = None
-        if self.last_color != self.color:
-            pygame.draw.rect(self.image, self.color, (10, 10, 280, 280), 3)
-            self.last_color = self.color
-
-
-class PositionCursorSprite(pygame.sprite.Sprite):
-    def __init__(self, group=None):
-        if group is not None:
-            pygame.sprite.Sprite.__init__(self, group)
-        else:
-            pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface((100, 100))
-        self.image = self.image.convert_alpha()
-        self.image.fill(COLOR_TRANSPARENT)
-        self.color = COLOR_GREEN
-        self.last_color = self.color
-        pygame.draw.rect(self.image, self.color, (10, 10, 80, 80), 3)
-        self.rect = self.image.get_rect()
-        self.move_to = None
-
-    def update(self):
-        if self.move_to:
-            self.rect.topleft = self.move_to
-            self.move_to = None
-        if self.last_color != self.color:
-            pygame.draw.rect(self.image, self.color, (10, 10, 80, 80), 3)
-            self.last_color = self.color
-
-
-class DirectionCursorSprite(pygame.sprite.Sprite):
-    def __init__(self, group=None):
-        if group is not None:
-            pygame.sprite.Sprite.__init__(self, group)
-        else:
-            pygame.sprite.Sprite.__init__(self)
-        self.image = pygame.Surface((300, 300))
-        self.image = self.image.convert_alpha()
-        self.image.fill(COLOR_TRANSPARENT)
-        self.color = COLOR_GREEN
-        self.last_color = self.color
-        self.direction = None
-        self.last_direction = None
-        self.rect = self.image.get_rect()
-
-    def update(self):
-        if self.last_color != self.color or self.direction != self.last_direction:
-            self.draw()
-            self.last_color = self.color
-            self.last_direction = self.direction
-
-    def draw(self):
-        self.image.fill(COLOR_TRANSPARENT)
-        x_offset = 100 * math.sin(degrees_to_radians(20))
-        y_offset = 100 * math.cos(degrees_to_radians(20))
-        if self.direction == DIRECTION_LEFT or self.direction is None:
-            pygame.draw.arc(self.image, self.color, (50, 50, 200, 200), degrees_to_radians(110),
-                            degrees_to_radians(250), 3)
-            arrow_start_pos = (150 - x_offset, 150 + y_offset)
-            arrow_left_end_pos = (arrow_start_pos[0] - 20, arrow_start_pos[1] + 5)
-            arrow_top_end_pos = (arrow_start_pos[0] - 5, arrow_start_pos[1] - 20)
-            pygame.draw.line(self.image, self.color, arrow_start_pos, arrow_left_end_pos, 3)
-            pygame.draw.line(self.image, self.color, arrow_start_pos, arrow_top_end_pos, 3)
-        if self.direction == DIRECTION_RIGHT or self.direction is None:
-            pygame.draw.arc(self.image, self.color, (50, 50, 200, 200), degrees_to_radians(290),
-                            degrees_to_radians(70), 3)
-            arrow_start_pos = (150 + x_offset, 150 + y_offset)
-            arrow_right_end_pos = (arrow_start_pos[0] + 20, arrow_start_pos[1] + 5)
-            arrow_top_end_pos = (arrow_start_pos[0] + 5, arrow_start_pos[1] - 20)
-            pygame.draw.line(self.image, self.color, arrow_start_pos, arrow_right_end_pos, 3)
-            pygame.draw.line(self.image, self.color, arrow_start_pos, arrow_top_end_pos, 3)
-
-
-def degrees_to_radians(deg):
-    return deg / 180.0 * math.pi
-
-
-class BlockSprite(pygame.sprite.Sprite):
-    def __init__(self, block, group=None):
-        if group is not None:
-            pygame.sprite.Sprite.__init__(self, group)
-        else:
-            pygame.sprite.Sprite.__init__(self)
-        self.block = block
-        self.image = None
-        self.board = None
-        self.board_changed = True
-
-    def update_board(self, board):
-        self.board = board
-        self.board_changed = True
-
-    def update(self):
-        if self.board_changed:
-            self.draw_block()
-            self.draw_marbles()
-            self.board_changed = False
-
-    def draw_block(self):
-        self.image = pygame.Surface((300, 300))
-        self.image.fill(COLOR_BLOCK)
-        # draw the 9 holes in the block
-        hole = pygame.Surface((100, 100))
-        hole = hole.convert_alpha()
-        hole.fill(COLOR_TRANSPARENT)
-        pygame.draw.circle(hole, COLOR_HOLE, (50, 50), 20, 3)
-        for i in range(3):
-            for j in range(3):
-                self.image.blit(hole, (i * 100, j * 100))
-
-    def draw_marbles(self):
-        marble = pygame.Surface((100, 100))
-        marble.convert_alpha()
-        if self.board is None:
-            return
-        this_block_positions = {position_in_block(pos, self.block): player
-                                for pos, player in self.board.items()
-                                if block_for_position(pos) == self.block}
-        for (x, y), player in this_block_positions.items():
-            marble.fill(COLOR_BLOCK)
-            pygame.draw.circle(marble, player.color, (50, 50), 25)
-            self.image.blit(marble, (x * 100, y * 100))
-
-
-class MessageSprite(pygame.sprite.Sprite):
-    def __init__(self, rect, font_color, font_size, font_name, group=None):
-        if group is not None:
-            pygame.sprite.Sprite.__init__(self, group)
-        else:
-            pygame.sprite.Sprite.__init__(self)
-        self.rect = Rect(rect)
-        self.font_color = font_color
-        self.font_size = font_size
-        self.font_name = font_name
-        self.text = None
-        self.last_text = None
-        self.image = pygame.Surface((self.rect.width, self.rect.height)).convert_alpha()
-        self.image.fill(COLOR_TRANSPARENT)
-
-    def update(self):
-        if self.last_text != self.text:
-            self.image.fill(COLOR_TRANSPARENT)
-            font = pygame.font.SysFont(self.font_name, self.font_size)
-            text_surf = font.render(self.text, 1, self.font_color)
-            text_width = text_surf.get_width()
-            text_height = text_surf.get_height()
-            self.image.blit(text_surf, (self.rect.width / 2 - text_width / 2,
-                                        self.rect.height / 2 - text_height / 2))
-            self.last_text = self.text
-
-
-class PygameView:
-    def __init__(self, event_manager):
-        self.manager = event_manager
-        self.manager.register_listener(self)
-        os.environ['SDL_VIDEO_CENTERED'] = '1'
-        pygame.init()
-        self.window = pygame.display.set_mode((850, 900))
-        pygame.display.set_caption('Pyntago')
-        self.background = pygame.Surface(self.window.get_size())
-        self.background.fill(COLOR_BLACK)
-        self.window.blit(self.background, (0, 0))
-        pygame.display.flip()
-        self.back_sprites = pygame.sprite.RenderUpdates()
-        self.front_sprites = pygame.sprite.RenderUpdates()
-        self.message_sprite = MessageSprite((0, 850, 850, 50), COLOR_BLACK, 35, 'Comic Sans MS', self.front_sprites)
-        self.block_cursor_sprite = BlockCursorSprite()
-        self.direction_cursor_sprite = DirectionCursorSprite()
-        self.position_cursor_sprite = PositionCursorSprite()
-
-    def show_board(self, game):
-        self.background.fill(COLOR_WHITE)
-        self.window.blit(self.background, (0, 0))
-        pygame.display.flip()
-        block_position = pygame.Rect((-300 + 124, 124, 300, 300))
-        column = 0
-        for block in game.blocks:
-            if column < 2:
-                block_position = block_position.move(301, 0)
-            else:
-                column = 0
-                block_position = block_position.move(-301, 301)
-            column += 1
-            new_sprite = BlockSprite(block, self.back_sprites)
-            new_sprite.rect = block_position
-
-    def update_board(self, board):
-        for block in range(4):
-            block_sprite = self.get_block_sprite(block)
-            block_sprite.update_board(board)
-
-    def show_block_cursor(self, block_cursor):
-        self.block_cursor_sprite.color = block_cursor.player.color
-        block_sprite = self.get_block_sprite(block_cursor.block)
-        self.block_cursor_sprite.rect.center = block_sprite.rect.center
-        self.front_sprites.add(self.block_cursor_sprite)
-
-    def move_block_cursor(self, block_cursor):
-        self.block_cursor_sprite.color = block_cursor.player.color
-        block_sprite = self.get_block_sprite(block_cursor.block)
-        self.block_cursor_sprite.move_to = block_sprite.rect.center
-
-    def hide_block_cursor(self):
-        self.block_cursor_sprite.kill()
-
-    def show_direction_cursor(self, direction_cursor):
-        self.direction_cursor_sprite.color = direction_cursor.player.color
-        block_cursor_sprite = self.block_cursor_sprite
-        self.direction_cursor_sprite.rect.center = block_cursor_sprite.rect.center
-        self.direction_cursor_sprite.direction = direction_cursor.direction
-        self.front_sprites.add(self.direction_cursor_sprite)
-
-    def move_direction_cursor(self, direction_cursor):
-        self.direction_cursor_sprite.color = direction_cursor.player.color
-        self.direction_cursor_sprite.direction = direction_cursor.direction
-
-    def hide_direction_cursor(self):
-        self.direction_cursor_sprite.kill()
-
-    def update_position_cursor_sprite(self, position_cursor):
-        block = block_for_position(position_cursor.position)
-        block_position = position_in_block(position_cursor.position, block)
-        block_sprite = self.get_block_sprite(block)
-        (x, y) = block_sprite.rect.topleft
-        self.position_cursor_sprite.move_to = (x + 100 * block_position.x,
-                                               y + 100 * block_position.y)
-
-    def show_position_cursor(self, position_cursor):
-        self.position_cursor_sprite.color = position_cursor.player.color
-        self.update_position_cursor_sprite(position_cursor)
-        self.front_sprites.add(self.position_cursor_sprite)
-
-    def move_position_cursor(self, position_cursor):
-        self.update_position_cursor_sprite(position_cursor)
-
-    def hide_position_cursor(self):
-        self.position_cursor_sprite.kill()
-
-    def show_message(self, game):
-        self.message_sprite.text = game.message
-        pygame.display.set_caption("Pyntago: " + game.message)
-
-    def get_block_sprite(self, block):
-        for sprite in self.back_sprites:
-            if hasattr(sprite, "block") and sprite.block == block:
-                return sprite
-
-    def notify(self, event):
-        if isinstance(event, CycleEvent):
-            self.back_sprites.clear(self.window, self.background)
-            self.front_sprites.clear(self.window, self.background)
-            self.back_sprites.update()
-            self.front_sprites.update()
-            dirty_rects_back = self.back_sprites.draw(self.window)
-            dirt_rects_front = self.front_sprites.draw(self.window)
-            pygame.display.update(dirt_rects_front + dirty_rects_back)
-        elif isinstance(event, BoardBuiltEvent):
-            self.show_board(event.game)
-        elif isinstance(event, BlockCursorPlaceEvent):
-            self.show_block_cursor(event.block_cursor)
-        elif isinstance(event, BlockCursorMoveEvent):
-            self.move_block_cursor(event.block_cursor)
-        elif isinstance(event, BlockCursorHideEvent):
-            self.hide_block_cursor()
-        elif isinstance(event, DirectionCursorPlaceEvent):
-            self.show_direction_cursor(event.direction_cursor)
-        elif isinstance(event, DirectionCursorMoveEvent):
-            self.move_direction_cursor(event.direction_cursor)
-        elif isinstance(event, DirectionCursorHideEvent):
-            self.hide_direction_cursor()
-        elif isinstance(event, PositionCursorPlaceEvent):
-            self.show_position_cursor(event.position_cursor)
-        elif isinstance(event, PositionCursorMoveEvent):
-            self.move_position_cursor(event.position_cursor)
-        elif isinstance(event, PositionCursorHideEvent):
-            self.hide_position_cursor()
-        elif isinstance(event, GameMessageUpdateEvent):
-            self.show_message(event.game)
-        elif isinstance(event, GameMoveUIEvent) or isinstance(event, GameBlockRotationUIEvent) \
-                or isinstance(event, GameBlockSelectionUIEvent):
-            self.update_board(event.game.board)
-        elif isinstance(event, GameFinishedUIEvent):
-            self.hide_position_cursor()
-            self.hide_block_cursor()
-            self.hide_direction_cursor()
-            self.update_board(event.game.board)
+        # stop the loop
+        self.alive = False
 
 
 Player = namedtuple('Player', 'name color')
 Position = namedtuple('Position', 'x y')
+Move = namedtuple('Move', 'cell block direction')
 
 
 class Game:
@@ -600,7 +482,12 @@ class Game:
 
     def __init__(self, event_manager):
         self.manager = event_manager
-        self.manager.register_listener(self)
+        self.manager.register_listener(self, {CycleEvent: self.on_cycle,
+                                              SelectPositionCursorEvent: self.on_position_selected,
+                                              BlockCursorSelectEvent: self.on_block_selected,
+                                              DirectionCursorSelectEvent: self.on_direction_selected,
+                                              RequestMoveEvent: self.on_move_request,
+                                              RequestSelectEvent: self.on_select_request})
         self.state = Game.STATE_PREPARING
         self.players = [Player("White", COLOR_WHITE),
                         Player("Black", COLOR_BLACK)]
@@ -668,34 +555,38 @@ class Game:
             self.message = message
         self.manager.post(GameMessageUpdateEvent(self))
 
-    def notify(self, event):
-        if isinstance(event, CycleEvent):
-            if self.state == Game.STATE_PREPARING:
-                self.start()
-        elif isinstance(event, SelectPositionCursorEvent):
-            if self.state == Game.STATE_MOVE:
-                self.move_finished()
-        elif isinstance(event, BlockCursorSelectEvent):
-            if self.state == Game.STATE_SELECT:
-                self.selection_finished()
-        elif isinstance(event, DirectionCursorSelectEvent):
-            if self.state == Game.STATE_ROTATE:
-                self.rotation_finished()
-        # Convert keyboard events according to current state
-        elif isinstance(event, RequestMoveEvent):
-            if self.state == Game.STATE_MOVE:
-                self.manager.post(RequestPositionCursorMoveEvent(event.direction))
-            elif self.state == Game.STATE_SELECT:
-                self.manager.post(RequestBlockCursorMoveEvent(event.direction))
-            elif self.state == Game.STATE_ROTATE:
-                self.manager.post(RequestDirectionCursorMoveEvent(event.direction))
-        elif isinstance(event, RequestSelectEvent):
-            if self.state == Game.STATE_MOVE:
-                self.manager.post(RequestPositionCursorSelectEvent())
-            elif self.state == Game.STATE_SELECT:
-                self.manager.post(RequestBlockCursorSelectEvent())
-            elif self.state == Game.STATE_ROTATE:
-                self.manager.post(RequestDirectionCursorSelectEvent())
+    def on_cycle(self, event):
+        if self.state == Game.STATE_PREPARING:
+            self.start()
+
+    def on_position_selected(self, event):
+        if self.state == Game.STATE_MOVE:
+            self.move_finished()
+
+    def on_block_selected(self, event):
+        if self.state == Game.STATE_SELECT:
+            self.selection_finished()
+
+    def on_direction_selected(self, event):
+        if self.state == Game.STATE_ROTATE:
+            self.rotation_finished()
+
+    # Convert keyboard events according to current state
+    def on_move_request(self, event):
+        if self.state == Game.STATE_MOVE:
+            self.manager.post(RequestPositionCursorMoveEvent(event.direction))
+        elif self.state == Game.STATE_SELECT:
+            self.manager.post(RequestBlockCursorMoveEvent(event.direction))
+        elif self.state == Game.STATE_ROTATE:
+            self.manager.post(RequestDirectionCursorMoveEvent(event.direction))
+
+    def on_select_request(self, event):
+        if self.state == Game.STATE_MOVE:
+            self.manager.post(RequestPositionCursorSelectEvent())
+        elif self.state == Game.STATE_SELECT:
+            self.manager.post(RequestBlockCursorSelectEvent())
+        elif self.state == Game.STATE_ROTATE:
+            self.manager.post(RequestDirectionCursorSelectEvent())
 
 
 def print_board(board):
@@ -709,127 +600,40 @@ def print_board(board):
 
 
 def rotate(board, block, direction=DIRECTION_LEFT):
-    # calculate the position for the center of the block to rotate
-    if block == 0:
-        x = 1
-        y = 1
-    elif block == 1:
-        x = 4
-        y = 1
-    elif block == 2:
-        x = 1
-        y = 4
-    elif block == 3:
-        x = 4
-        y = 4
-    new_board = {}
-    # list of pairs of positions with rotation pairs (source, destination) around the center block
-    left_rotation = [((x, y - 1), (x - 1, y)),  # N = W
-                     ((x - 1, y), (x, y + 1)),  # W = S
-                     ((x, y + 1), (x + 1, y)),  # S = E
-                     ((x + 1, y), (x, y - 1)),  # E = N
-                     ((x - 1, y - 1), (x - 1, y + 1)),  # NW = SW
-                     ((x - 1, y + 1), (x + 1, y + 1)),  # SW = SE
-                     ((x + 1, y + 1), (x + 1, y - 1)),  # SE = NE
-                     ((x + 1, y - 1), (x - 1, y - 1)),  # NE = NW
-                     ((x, y), (x, y)),  # C = C
-                     ]
-    right_rotation = [((x, y - 1), (x + 1, y)),  # N = E
-                      ((x + 1, y), (x, y + 1)),  # E = S
-                      ((x, y + 1), (x - 1, y)),  # S = W
-                      ((x - 1, y), (x, y - 1)),  # W = N
-                      ((x - 1, y + 1), (x - 1, y - 1)),  # SW = NW
-                      ((x - 1, y - 1), (x + 1, y - 1)),  # NW = NE
-                      ((x + 1, y - 1), (x + 1, y + 1)),  # NE = SE
-                      ((x + 1, y + 1), (x - 1, y + 1)),  # SE = SW
-                      ((x, y), (x, y)),  # C = C
-                      ]
-    if direction == DIRECTION_LEFT:
-        rotation = left_rotation
-    elif direction == DIRECTION_RIGHT:
-        rotation = right_rotation
-    # first add only the rotated positions
-    for pos, player in board.items():
-        for source, destination in rotation:
-            if pos == source:
-                new_board[Position(*destination)] = player
-    # now add the non rotated positions
-    for pos, player in board.items():
-        if not any(pos in r for r in rotation):
-            new_board[pos] = player
-    return new_board
+    # source -> destination pairs for the 9 positions of the block, see ROTATION_MAPS
+    rotation = ROTATION_MAPS[(block, direction)]
+    return {rotation.get(pos, pos): player for pos, player in board.items()}
 
 
 def winner(board, players):
     if len(board) == 36:
         return Player(None, None)  # is a tie
-    winners = []
-    for player in players:
-        if check_cols(board, player) or check_rows(board, player) or check_diagonals(board, player):
-            winners.append(player)
-    if len(winners) == 2:
+    result = masks_winner(player_mask(board, players[0]), player_mask(board, players[1]))
+    if result == TIE:
         return Player(None, None)  # is a tie
-    elif len(winners) == 1:
-        return winners[0]
+    elif result is not None:
+        return players[result]
     return None
 
 
+def player_mask(board, player):
+    mask = 0
+    for (x, y), owner in board.items():
+        if owner == player:
+            mask |= 1 << y * 6 + x
+    return mask
+
+
 def check_rows(board, player):
-    for y in range(6):
-        count, max_count = 0, 0
-        for x in range(6):
-            if ((x, y), player) in board.items():
-                count += 1
-                max_count = count
-            else:
-                count = 0
-        if max_count >= 5:
-            return True
-    return False
+    return has_line(player_mask(board, player), ROW_LINES)
 
 
 def check_cols(board, player):
-    for x in range(6):
-        count, max_count = 0, 0
-        for y in range(6):
-            if ((x, y), player) in board.items():
-                count += 1
-                max_count = count
-            else:
-                count = 0
-        if max_count >= 5:
-            return True
-    return False
+    return has_line(player_mask(board, player), COLUMN_LINES)
 
 
 def check_diagonals(board, player):
-    # check descending diagonals
-    # there are 3 diagonals that can hold a line of 5
-    for y_offset in range(-1, 2):
-        count, max_count = 0, 0
-        for x in range(6):
-            y = y_offset + x
-            if 0 <= y < 6 and ((x, y), player) in board.items():
-                count += 1
-                max_count = count
-            else:
-                count = 0
-        if max_count >= 5:
-            return True
-    # check ascending diagonals
-    # there are 3 diagonals that can hold a line of 5
-    for y_offset in range(-1, 2):
-        count, max_count = 0, 0
-        for x in range(6):
-            y = y_offset - x + 5
-            if 0 <= y < 6 and ((x, y), player) in board.items():
-                count += 1
-                max_count = count
-            else:
-                count = 0
-        if max_count >= 5:
-            return True
-    return False
+    return has_line(player_mask(board, player), DIAGONAL_LINES)
 
 
 def position_neighbor(position, direction):
@@ -894,6 +698,283 @@ def block_neighbor(block, direction):
     return None
 
 
+# Bitboards
+# A cell is the index y * 6 + x of a position, a mask has the bit of every cell set.
+CELL_COUNT = 36
+FULL_MASK = (1 << CELL_COUNT) - 1
+BLOCK_CENTERS = [Position(1, 1), Position(4, 1), Position(1, 4), Position(4, 4)]
+
+
+def cell_index(position):
+    return position.y * 6 + position.x
+
+
+def cell_position(cell):
+    return Position(cell % 6, cell // 6)
+
+
+def count_bits(mask):
+    return bin(mask).count('1')
+
+
+def rotated_position(position, block, direction):
+    """Where a position of the block ends after rotating it one notch in the direction."""
+    center = BLOCK_CENTERS[block]
+    dx, dy = position.x - center.x, position.y - center.y
+    if direction == DIRECTION_LEFT:
+        return Position(center.x + dy, center.y - dx)
+    elif direction == DIRECTION_RIGHT:
+        return Position(center.x - dy, center.y + dx)
+    raise ValueError("Invalid rotation direction: {}".format(direction))
+
+
+def block_positions(block):
+    """The 9 positions of a block, row by row from its top left corner."""
+    center = BLOCK_CENTERS[block]
+    return [Position(center.x + dx, center.y + dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+
+
+def _rotation_table(block, direction):
+    """Rotated cells (as a full board mask) for every 9 bit pattern of the block, see block_pattern()."""
+    destinations = [1 << cell_index(rotated_position(pos, block, direction)) for pos in block_positions(block)]
+    return tuple(sum(bit for i, bit in enumerate(destinations) if pattern >> i & 1) for pattern in range(512))
+
+
+ROTATION_DIRECTIONS = (DIRECTION_LEFT, DIRECTION_RIGHT)
+ROTATION_MAPS = {(block, direction): {pos: rotated_position(pos, block, direction) for pos in block_positions(block)}
+                 for block in range(4) for direction in ROTATION_DIRECTIONS}
+BLOCK_MASKS = [sum(1 << cell_index(pos) for pos in block_positions(block)) for block in range(4)]
+BLOCK_ORIGINS = [cell_index(block_positions(block)[0]) for block in range(4)]
+OUTSIDE_BLOCK_MASKS = [FULL_MASK & ~block_mask for block_mask in BLOCK_MASKS]
+CELL_BLOCKS = [next(block for block in range(4) if BLOCK_MASKS[block] >> cell & 1) for cell in range(CELL_COUNT)]
+ROTATION_TABLES = {(block, direction): _rotation_table(block, direction)
+                   for block in range(4) for direction in ROTATION_DIRECTIONS}
+
+
+def block_pattern(mask, block):
+    """The 9 cells of the block in the mask packed as the bits 0-8, row by row."""
+    origin = BLOCK_ORIGINS[block]
+    return mask >> origin & 7 | (mask >> origin + 6 & 7) << 3 | (mask >> origin + 12 & 7) << 6
+
+
+def rotate_mask(mask, block, direction):
+    return mask & OUTSIDE_BLOCK_MASKS[block] | ROTATION_TABLES[(block, direction)][block_pattern(mask, block)]
+
+
+def _pattern_mask(pattern):
+    """Mask with the 9 bit pattern in the first block, the inverse of block_pattern(mask, 0)."""
+    return sum(1 << i // 3 * 6 + i % 3 for i in range(9) if pattern >> i & 1)
+
+
+def _turned_pattern(pattern, turns):
+    mask = _pattern_mask(pattern)
+    for _ in range(turns):
+        mask = rotate_mask(mask, 0, DIRECTION_LEFT)
+    return block_pattern(mask, 0)
+
+
+# Block patterns that a quarter turn and a half turn leave as they are
+QUARTER_SYMMETRIC = tuple(_turned_pattern(pattern, 1) == pattern for pattern in range(512))
+HALF_SYMMETRIC = tuple(_turned_pattern(pattern, 2) == pattern for pattern in range(512))
+
+
+# Rotations of each block for blocks that look the same after any turn, after a half turn and the others
+_DISTINCT_BLOCK_ROTATIONS = [((), ((block, DIRECTION_LEFT),), ((block, DIRECTION_LEFT), (block, DIRECTION_RIGHT)))
+                             for block in range(4)]
+
+
+def block_rotations(first, second, block):
+    """The (block, direction) rotations of the block that give different boards, none if it looks the same turned."""
+    first_pattern, second_pattern = block_pattern(first, block), block_pattern(second, block)
+    if QUARTER_SYMMETRIC[first_pattern] and QUARTER_SYMMETRIC[second_pattern]:
+        return _DISTINCT_BLOCK_ROTATIONS[block][0]
+    elif HALF_SYMMETRIC[first_pattern] and HALF_SYMMETRIC[second_pattern]:
+        return _DISTINCT_BLOCK_ROTATIONS[block][1]
+    return _DISTINCT_BLOCK_ROTATIONS[block][2]
+
+
+def placement_rotations(rotations, first, second, cell):
+    """The (block, direction) rotations giving different boards after placing in the cell, given block_rotations()
+    of every block before the placement. Of the rotations that change nothing only the first is kept."""
+    block = CELL_BLOCKS[cell]
+    distinct = []
+    unchanged = False
+    for other_block, block_rots in enumerate(rotations):
+        if other_block == block:
+            block_rots = block_rotations(first, second, block)
+        if block_rots:
+            distinct += block_rots
+        elif not unchanged:
+            distinct.append((other_block, DIRECTION_LEFT))
+            unchanged = True
+    return distinct
+
+
+def _line_mask(x, y, dx, dy):
+    return sum(1 << cell_index(Position(x + dx * i, y + dy * i)) for i in range(5))
+
+
+# Every line of five on the board: 12 rows, 12 columns and 8 diagonals
+ROW_LINES = tuple(_line_mask(x, y, 1, 0) for y in range(6) for x in range(2))
+COLUMN_LINES = tuple(_line_mask(x, y, 0, 1) for x in range(6) for y in range(2))
+DIAGONAL_LINES = tuple(_line_mask(x, y, 1, 1) for x in range(2) for y in range(2)) + \
+                 tuple(_line_mask(x, y, -1, 1) for x in range(4, 6) for y in range(2))
+WIN_LINES = ROW_LINES + COLUMN_LINES + DIAGONAL_LINES
+# Lines that go through a cell, the only ones a marble placed there can complete
+CELL_LINES = [tuple(line for line in WIN_LINES if line >> cell & 1) for cell in range(CELL_COUNT)]
+# Lines that cross a block, the only ones its rotation can complete or break
+BLOCK_LINES = [tuple(line for line in WIN_LINES if line & block_mask) for block_mask in BLOCK_MASKS]
+TIE = -1
+
+
+def has_line(mask, lines=WIN_LINES):
+    """True if the mask holds all the cells of any of the lines."""
+    for line in lines:
+        if mask & line == line:
+            return True
+    return False
+
+
+def masks_winner(first, second, lines=WIN_LINES):
+    """Index of the only player with a complete line, TIE if both have one or None.
+    It does not check for a full board."""
+    first_wins = has_line(first, lines)
+    second_wins = has_line(second, lines)
+    if first_wins and second_wins:
+        return TIE
+    elif first_wins:
+        return 0
+    elif second_wins:
+        return 1
+    return None
+
+
+class Bitboard(namedtuple('Bitboard', 'first second')):
+    """Compact board: one 36 bit mask for each player, in the same order as Game.players.
+    It is immutable, every operation returns a new Bitboard."""
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, board, players):
+        masks = [0, 0]
+        for position, player in board.items():
+            masks[players.index(player)] |= 1 << cell_index(position)
+        return cls(*masks)
+
+    def to_dict(self, players):
+        board = {}
+        for player, mask in zip(players, self):
+            for cell in range(CELL_COUNT):
+                if mask >> cell & 1:
+                    board[cell_position(cell)] = player
+        return board
+
+    @classmethod
+    def unpack(cls, packed):
+        return cls(packed & FULL_MASK, packed >> CELL_COUNT)
+
+    def pack(self):
+        """Both masks in a single 72 bit integer."""
+        return self.first | self.second << CELL_COUNT
+
+    def occupied(self):
+        return self.first | self.second
+
+    def stones(self):
+        return count_bits(self.first | self.second)
+
+    def player_at(self, cell):
+        """Index of the player with a marble in the cell or None if it is empty."""
+        if self.first >> cell & 1:
+            return 0
+        if self.second >> cell & 1:
+            return 1
+        return None
+
+    def place(self, cell, player_index):
+        bit = 1 << cell
+        if (self.first | self.second) & bit:
+            raise ValueError("Cell {} is not empty".format(cell))
+        if player_index == 0:
+            return Bitboard(self.first | bit, self.second)
+        return Bitboard(self.first, self.second | bit)
+
+    def rotate(self, block, direction=DIRECTION_LEFT):
+        return Bitboard(rotate_mask(self.first, block, direction), rotate_mask(self.second, block, direction))
+
+    def winner(self, players):
+        """Same result as winner() for the equivalent dict board."""
+        if self.first | self.second == FULL_MASK:
+            return Player(None, None)  # is a tie
+        return self._player_result(masks_winner(self.first, self.second), players)
+
+    def placement_winner(self, cell, players):
+        """Like winner() after placing a marble in the cell of a board that had no winner.
+        Only the lines through that cell are checked."""
+        if self.first | self.second == FULL_MASK:
+            return Player(None, None)  # is a tie
+        return self._player_result(masks_winner(self.first, self.second, CELL_LINES[cell]), players)
+
+    def play(self, move, player_index):
+        """Board after the player makes the move on a board without winner, and the index of the winner,
+        TIE or None. Like in Game, the block is not rotated when the placement ends the game."""
+        placed = self.place(move.cell, player_index)
+        if placed.first | placed.second == FULL_MASK:
+            return placed, TIE
+        if has_line(placed[player_index], CELL_LINES[move.cell]):
+            return placed, player_index
+        rotated = placed.rotate(move.block, move.direction)
+        return rotated, masks_winner(rotated.first, rotated.second, BLOCK_LINES[move.block])
+
+    def moves(self, player_index, cells=range(CELL_COUNT)):
+        """The legal moves of the player on a board without winner, trying the cells in the given order.
+        For each cell, moves giving the same board are left out: a winning placement or one filling the board is a
+        single move, and so are the rotations of blocks that look the same turned (like empty ones)."""
+        first, second = self
+        occupied = first | second
+        rotations = [block_rotations(first, second, block) for block in range(4)]
+        moves = []
+        for cell in cells:
+            if occupied >> cell & 1:
+                continue
+            if player_index == 0:
+                placed_first, placed_second = first | 1 << cell, second
+            else:
+                placed_first, placed_second = first, second | 1 << cell
+            if occupied | 1 << cell == FULL_MASK or has_line((placed_first, placed_second)[player_index],
+                                                              CELL_LINES[cell]):
+                moves.append(Move(cell, 0, DIRECTION_LEFT))  # the game ends before the rotation
+                continue
+            moves += [Move(cell, block, direction)
+                      for block, direction in placement_rotations(rotations, placed_first, placed_second, cell)]
+        return moves
+
+    def successors(self, player_index, cells=range(CELL_COUNT)):
+        """Yields (move, board, result) like play() for the moves(), skipping those leading to a board reached before
+        from another cell. Callers can stop early without paying for the rest."""
+        seen = set()
+        for move in self.moves(player_index, cells):
+            board, result = self.play(move, player_index)
+            if board not in seen:
+                seen.add(board)
+                yield move, board, result
+
+    def rotation_winner(self, block, players):
+        """Like winner() after rotating the block of a board that had no winner.
+        Only the lines crossing that block are checked."""
+        if self.first | self.second == FULL_MASK:
+            return Player(None, None)  # is a tie
+        return self._player_result(masks_winner(self.first, self.second, BLOCK_LINES[block]), players)
+
+    @staticmethod
+    def _player_result(result, players):
+        if result == TIE:
+            return Player(None, None)  # is a tie
+        elif result is not None:
+            return players[result]
+        return None
+
+
 class BlockCursor:
     """Model of a cursor for selecting the next block to rotate."""
     STATE_INACTIVE = 0
@@ -901,7 +982,10 @@ class BlockCursor:
 
     def __init__(self, event_manager, start_block):
         self.manager = event_manager
-        self.manager.register_listener(self)
+        self.manager.register_listener(self, {GameBlockSelectionUIEvent: self.on_selection_ui,
+                                              GameBlockRotationUIEvent: self.on_rotation_ui,
+                                              RequestBlockCursorMoveEvent: self.on_move_request,
+                                              RequestBlockCursorSelectEvent: self.on_select_request})
         self.start_block = start_block
         self.block = None
         self.player = None
@@ -935,17 +1019,19 @@ class BlockCursor:
         self.state = BlockCursor.STATE_INACTIVE
         self.manager.post(BlockCursorSelectEvent(self))
 
-    def notify(self, event):
-        # Game UI events
-        if isinstance(event, GameBlockSelectionUIEvent):
-            self.place(event.game.current_player)
-        elif isinstance(event, GameBlockRotationUIEvent):
-            self.hide()
-        # Action request
-        elif isinstance(event, RequestBlockCursorMoveEvent):
-            self.move(event.direction)
-        elif isinstance(event, RequestBlockCursorSelectEvent):
-            self.select()
+    # Game UI events
+    def on_selection_ui(self, event):
+        self.place(event.game.current_player)
+
+    def on_rotation_ui(self, event):
+        self.hide()
+
+    # Action request
+    def on_move_request(self, event):
+        self.move(event.direction)
+
+    def on_select_request(self, event):
+        self.select()
 
 
 class PositionCursor:
@@ -955,7 +1041,10 @@ class PositionCursor:
 
     def __init__(self, event_manager, start_position):
         self.manager = event_manager
-        self.manager.register_listener(self)
+        self.manager.register_listener(self, {GameMoveUIEvent: self.on_move_ui,
+                                              GameBlockSelectionUIEvent: self.on_selection_ui,
+                                              RequestPositionCursorMoveEvent: self.on_move_request,
+                                              RequestPositionCursorSelectEvent: self.on_select_request})
         self.start_position = start_position
         self.position = None
         self.player = None
@@ -989,17 +1078,19 @@ class PositionCursor:
         self.state = PositionCursor.STATE_INACTIVE
         self.manager.post(SelectPositionCursorEvent(self))
 
-    def notify(self, event):
-        # Game UI events
-        if isinstance(event, GameMoveUIEvent):
-            self.place(event.game.current_player)
-        elif isinstance(event, GameBlockSelectionUIEvent):
-            self.hide()
-        # Action request
-        elif isinstance(event, RequestPositionCursorMoveEvent):
-            self.move(event.direction)
-        elif isinstance(event, RequestPositionCursorSelectEvent):
-            self.select()
+    # Game UI events
+    def on_move_ui(self, event):
+        self.place(event.game.current_player)
+
+    def on_selection_ui(self, event):
+        self.hide()
+
+    # Action request
+    def on_move_request(self, event):
+        self.move(event.direction)
+
+    def on_select_request(self, event):
+        self.select()
 
 
 class DirectionCursor:
@@ -1009,7 +1100,10 @@ class DirectionCursor:
 
     def __init__(self, event_manager):
         self.manager = event_manager
-        self.manager.register_listener(self)
+        self.manager.register_listener(self, {GameBlockRotationUIEvent: self.on_rotation_ui,
+                                              GameMoveUIEvent: self.on_move_ui,
+                                              RequestDirectionCursorMoveEvent: self.on_move_request,
+                                              RequestDirectionCursorSelectEvent: self.on_select_request})
         self.direction = None
         self.player = None
         self.state = DirectionCursor.STATE_INACTIVE
@@ -1043,28 +1137,75 @@ class DirectionCursor:
         self.state = DirectionCursor.STATE_INACTIVE
         self.manager.post(DirectionCursorSelectEvent(self))
 
-    def notify(self, event):
-        # Game UI events
-        if isinstance(event, GameBlockRotationUIEvent):
-            self.place(event.game.current_player)
-        elif isinstance(event, GameMoveUIEvent):
-            self.hide()
-        # Action request
-        elif isinstance(event, RequestDirectionCursorMoveEvent):
-            self.move(event.direction)
-        elif isinstance(event, RequestDirectionCursorSelectEvent):
-            self.select()
+    # Game UI events
+    def on_rotation_ui(self, event):
+        self.place(event.game.current_player)
+
+    def on_move_ui(self, event):
+        self.hide()
+
+    # Action request
+    def on_move_request(self, event):
+        self.move(event.direction)
+
+    def on_select_request(self, event):
+        self.select()
 
 
 def main():
     """Program entry point."""
-    manager = EventManager()
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--computer', choices=['white', 'black'], action='append', default=[],
+                        help='side played by the computer, can be given twice')
+    parser.add_argument('--think-time', type=float, default=2.0, help='seconds the computer can think per move')
+    parser.add_argument('--verbose', action='store_true', help='print every event')
+    parser.add_argument('--event-log', type=argparse.FileType('w'), help='write every event as JSON lines')
+    parser.add_argument('--engine', choices=['alphabeta', 'mcts'], default='alphabeta',
+                        help='search used by the computer')
+    parser.add_argument('--book', metavar='FILE', help='opening book for the first moves of the computer')
+    parser.add_argument('--tablebase', metavar='FILE', help='endgame tablebase for the alphabeta computer')
+    parser.add_argument('--weights', metavar='FILE', help='line weights of the alphabeta computer, see evaluation')
+    args = parser.parse_args()
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format='%(message)s')
+    event_log = EventLog(args.event_log) if args.event_log else None
+    from view import KeyboardController, PygameView
+    manager = EventManager(queued=True)
     keybd = KeyboardController(manager)
-    cycle = CycleController(manager)
+    cycle = CycleController(manager, idle_wait=keybd.wait_for_input)
     view = PygameView(manager)
     game = Game(manager)
-    cycle.run()
+    book = None
+    if args.book:
+        from book import OpeningBook
+        book = OpeningBook.load(args.book)
+    computers = []
+    pooled = []  # searchers with worker processes to close at the end
+    for side in args.computer:
+        searcher = None
+        if args.engine == 'mcts':
+            from mcts import MonteCarloSearcher
+            searcher = MonteCarloSearcher(args.think_time)
+            pooled.append(searcher)
+        elif args.tablebase or args.weights:
+            from evaluation import Evaluator
+            from search import Searcher
+            from tablebase import Tablebase
+            searcher = Searcher(args.think_time, tablebase=Tablebase.load(args.tablebase) if args.tablebase else None,
+                                evaluator=Evaluator.load(args.weights) if args.weights else None)
+        computers.append(ComputerPlayer(manager, game, ['white', 'black'].index(side), args.think_time, searcher,
+                                        book))
+    try:
+        cycle.run()
+    finally:
+        for searcher in pooled:
+            searcher.close()
+    if event_log is not None:
+        event_log.stop()
 
 
 if __name__ == "__main__":
-    main()
+    # run the imported module, so the other modules share its event classes
+    import pyntago
+    pyntago.main()
@@ -1,4 +1,10 @@
 #! /usr/bin/env python
+import io
+import json
+import os
+import subprocess
+import sys
+import time
 import unittest
 
 import pyntago
@@ -147,6 +153,242 @@ class TwoDiagonalStripeBoards(unittest.TestCase):
         self.assertEqual(pyntago.winner(new_board, self.players), players[0])
 
 
+class BitboardBoards(unittest.TestCase):
+    def setUp(self):
+        self.players = [pyntago.Player('White', pyntago.COLOR_WHITE), pyntago.Player('Black', pyntago.COLOR_BLACK)]
+        self.board = {}
+        for x in range(6):
+            self.board[pyntago.Position(x, x)] = self.players[0]
+        for x in range(5):
+            self.board[pyntago.Position(x + 1, x)] = self.players[1]
+        self.bitboard = pyntago.Bitboard.from_dict(self.board, self.players)
+
+    def test_converts_back_to_the_same_dict(self):
+        self.assertEqual(self.bitboard.to_dict(self.players), self.board)
+        self.assertEqual(self.bitboard.stones(), len(self.board))
+
+    def test_has_the_same_winner(self):
+        self.assertEqual(self.bitboard.winner(self.players), pyntago.winner(self.board, self.players))
+
+    def test_accepts_boards_keyed_by_plain_tuples(self):
+        board = {(x, y): player for (x, y), player in self.board.items()}
+        self.assertEqual(pyntago.winner(board, self.players), pyntago.winner(self.board, self.players))
+        self.assertTrue(pyntago.check_diagonals(board, self.players[0]))
+        self.assertFalse(pyntago.check_rows(board, self.players[1]))
+
+    def test_rotates_like_the_dict_board(self):
+        for block in range(4):
+            for direction in (pyntago.DIRECTION_LEFT, pyntago.DIRECTION_RIGHT):
+                rotated = self.bitboard.rotate(block, direction)
+                self.assertEqual(rotated.to_dict(self.players), pyntago.rotate(self.board, block, direction))
+                self.assertEqual(rotated.winner(self.players),
+                                 pyntago.winner(pyntago.rotate(self.board, block, direction), self.players))
+
+    def test_has_the_same_winner_checking_only_touched_lines(self):
+        # white diagonal missing (3, 3), completed by rotating block 3 to the left
+        board = pyntago.Bitboard.from_dict({pyntago.Position(x, x): self.players[0] for x in range(5) if x != 3},
+                                           self.players).place(pyntago.cell_index(pyntago.Position(5, 3)), 0)
+        self.assertIsNone(board.winner(self.players))
+        rotated = board.rotate(3, pyntago.DIRECTION_LEFT)
+        self.assertEqual(rotated.rotation_winner(3, self.players), self.players[0])
+        self.assertEqual(rotated.rotation_winner(3, self.players), rotated.winner(self.players))
+        cell = pyntago.cell_index(pyntago.Position(0, 5))
+        placed = pyntago.Bitboard(pyntago.ROW_LINES[-2] & ~(1 << cell), 0).place(cell, 0)
+        self.assertEqual(placed.placement_winner(cell, self.players), self.players[0])
+
+    def test_has_32_winning_lines(self):
+        self.assertEqual(len(set(pyntago.WIN_LINES)), 32)
+
+    def test_places_only_on_empty_cells(self):
+        cell = pyntago.cell_index(pyntago.Position(5, 0))
+        placed = self.bitboard.place(cell, 1)
+        self.assertEqual(placed.player_at(cell), 1)
+        self.assertEqual(placed.stones(), len(self.board) + 1)
+        with self.assertRaises(ValueError):
+            placed.place(cell, 0)
+
+
+class MoveGeneration(unittest.TestCase):
+    def reachable(self, board, player_index):
+        results = set()
+        for cell in range(pyntago.CELL_COUNT):
+            if board.player_at(cell) is None:
+                for block in range(4):
+                    for direction in pyntago.ROTATION_DIRECTIONS:
+                        results.add(board.play(pyntago.Move(cell, block, direction), player_index))
+        return results
+
+    def test_reaches_every_board_once(self):
+        # empty, block 0 the same after a half turn, a win by placement and a tie filling the last cell
+        boards = [pyntago.Bitboard(0, 0), pyntago.Bitboard(0o40001, 0o10004),
+                  pyntago.Bitboard(pyntago.ROW_LINES[0] & ~1, 0o17 << 12),
+                  pyntago.Bitboard(0o340473652245, 0o427304125532)]
+        for board in boards:
+            self.assertIsNone(pyntago.masks_winner(board.first, board.second))
+            player_index = board.stones() % 2
+            successors = [(board, result) for _, board, result in board.successors(player_index)]
+            self.assertEqual(len(successors), len(set(successors)))
+            self.assertEqual(set(successors), self.reachable(board, player_index))
+        self.assertEqual(len(boards[0].moves(0)), 32 * 3 + 4)
+        self.assertEqual(len(list(boards[0].successors(0))), 36)
+        self.assertEqual(boards[2].moves(0)[0], pyntago.Move(0, 0, pyntago.DIRECTION_LEFT))
+        self.assertEqual(list(boards[3].successors(1)), [(pyntago.Move(30, 0, pyntago.DIRECTION_LEFT),
+                                                          boards[3].place(30, 1), pyntago.TIE)])
+
+    def test_streams_the_successors(self):
+        successors = pyntago.Bitboard(0, 0).successors(0, cells=[35, 0])
+        move, board, result = next(successors)
+        self.assertEqual(move.cell, 35)
+        self.assertEqual((board.first, result), (1 << 35, None))
+
+
+class Recorder:
+    def __init__(self, name, log):
+        self.name = name
+        self.log = log
+
+    def record(self, event):
+        self.log.append((self.name, event.name))
+
+
+class EventDispatch(unittest.TestCase):
+    def setUp(self):
+        self.manager = pyntago.EventManager()
+        self.log = []
+        self.everything = Recorder('everything', self.log)
+        self.quit = Recorder('quit', self.log)
+        self.manager.register_listener(self.everything, {pyntago.Event: self.everything.record})
+        self.manager.register_listener(self.quit, {pyntago.RequestQuitEvent: self.quit.record})
+
+    def test_only_reaches_subscribed_handlers_in_registration_order(self):
+        self.manager.post(pyntago.CycleEvent())
+        self.manager.post(pyntago.RequestQuitEvent())
+        self.assertEqual(self.log, [('everything', 'CPU cycle event'), ('everything', 'Program quit request event'),
+                                    ('quit', 'Program quit request event')])
+
+    def test_does_not_keep_listeners_alive(self):
+        del self.quit
+        self.manager.post(pyntago.RequestQuitEvent())
+        self.assertEqual(self.log, [('everything', 'Program quit request event')])
+
+    def test_deregisters_every_handler_of_a_listener(self):
+        self.manager.deregister_listener(self.everything)
+        self.manager.post(pyntago.RequestQuitEvent())
+        self.assertEqual(self.log, [('quit', 'Program quit request event')])
+
+
+class Forwarder:
+    def __init__(self, manager, log):
+        self.manager = manager
+        self.log = log
+        self.manager.register_listener(self, {pyntago.RequestSelectEvent: self.on_select_request,
+                                              pyntago.RequestQuitEvent: self.on_quit_request})
+
+    def on_select_request(self, event):
+        self.manager.post(pyntago.RequestQuitEvent())
+        self.log.append('select handled')
+
+    def on_quit_request(self, event):
+        self.log.append('quit handled')
+
+
+class QueuedEvents(unittest.TestCase):
+    def setUp(self):
+        self.manager = pyntago.EventManager(queued=True)
+        self.log = []
+        self.forwarder = Forwarder(self.manager, self.log)
+
+    def test_waits_for_a_cycle(self):
+        self.manager.post(pyntago.RequestSelectEvent())
+        self.assertEqual(self.log, [])
+        self.manager.post(pyntago.CycleEvent())
+        self.assertEqual(self.log, ['select handled', 'quit handled'])
+
+    def test_handles_events_posted_by_handlers_after_the_current_one(self):
+        self.manager.post(pyntago.RequestSelectEvent())
+        self.manager.post(pyntago.RequestSelectEvent())
+        self.manager.post(pyntago.CycleEvent())
+        self.assertEqual(self.log, ['select handled', 'select handled', 'quit handled', 'quit handled'])
+
+    def test_keeps_only_the_last_cursor_move_of_a_batch(self):
+        moves = []
+        recorder = Recorder('move', moves)
+        self.manager.register_listener(recorder, {pyntago.PositionCursorMoveEvent: recorder.record})
+        cursor = pyntago.PositionCursor(self.manager, start_position=pyntago.Position(2, 2))
+        cursor.place(None)
+        for direction in (pyntago.DIRECTION_UP, pyntago.DIRECTION_UP, pyntago.DIRECTION_LEFT):
+            self.manager.post(pyntago.RequestPositionCursorMoveEvent(direction))
+        self.manager.post(pyntago.CycleEvent())
+        self.assertEqual(cursor.position, pyntago.Position(1, 0))
+        self.assertEqual(len(moves), 1)
+        self.assertEqual(self.manager.coalesced, 2)
+
+
+class CycleCounter:
+    def __init__(self, manager, cycles, post_events):
+        self.manager = manager
+        self.manager.register_listener(self, {pyntago.CycleEvent: self.on_cycle})
+        self.cycles = cycles
+        self.post_events = post_events
+
+    def on_cycle(self, event):
+        self.cycles -= 1
+        if self.post_events:
+            self.manager.post(pyntago.RequestSelectEvent())
+        if not self.cycles:
+            self.manager.post(pyntago.RequestQuitEvent())
+
+
+class CycleLoop(unittest.TestCase):
+    def setUp(self):
+        self.manager = pyntago.EventManager()
+        self.waits = []
+
+    def test_waits_for_input_when_nothing_happens(self):
+        cycle = pyntago.CycleController(self.manager, fps=1000, idle_wait=self.waits.append, idle_delay=0)
+        counter = CycleCounter(self.manager, 5, post_events=False)
+        cycle.run()
+        self.assertEqual(len(self.waits), 4)
+        self.assertEqual(cycle.frame_stats()['frames'], 5)
+        self.assertEqual(counter.cycles, 0)
+
+    def test_is_capped_to_the_frame_rate_while_busy(self):
+        cycle = pyntago.CycleController(self.manager, fps=100, idle_wait=self.waits.append, idle_delay=0)
+        counter = CycleCounter(self.manager, 5, post_events=True)
+        start = time.perf_counter()
+        cycle.run()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.04)
+        self.assertEqual(self.waits, [])
+        self.assertLessEqual(cycle.frame_stats()['fps'], 100)
+        self.assertEqual(counter.cycles, 0)
+
+
+class StructuredEventLog(unittest.TestCase):
+    def test_writes_a_json_line_per_event(self):
+        stream = io.StringIO()
+        event_log = pyntago.EventLog(stream)
+        try:
+            manager = pyntago.EventManager()
+            cursor = pyntago.BlockCursor(manager, start_block=0)
+            cursor.place(players[0])
+            manager.post(pyntago.CycleEvent())
+            manager.post(pyntago.RequestBlockCursorMoveEvent(pyntago.DIRECTION_RIGHT))
+        finally:
+            event_log.stop()
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([record['event'] for record in records],
+                         ['BlockCursorPlaceEvent', 'RequestBlockCursorMoveEvent', 'BlockCursorMoveEvent'])
+        self.assertEqual(records[1]['payload'], {'direction': pyntago.DIRECTION_RIGHT})
+        self.assertEqual(records[2]['payload']['block_cursor.block'], 1)
+
+
+class RulesImport(unittest.TestCase):
+    def test_does_not_load_pygame(self):
+        code = "import sys, pyntago; pyntago.rotate({}, 0); sys.exit('pygame' in sys.modules)"
+        directory = os.path.dirname(os.path.abspath(__file__))
+        self.assertEqual(subprocess.call([sys.executable, '-c', code], cwd=directory), 0)
+
+
 def main():
     unittest.main()
 
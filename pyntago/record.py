@@ -0,0 +1,100 @@
+"""Pyntago: compact binary game records.
+A file starts with MAGIC followed by the games. A game is a header of 4 bytes (result, length of the white name,
+length of the black name, length of the moves), the utf-8 names and the moves. A ply is one byte: the rank of its cell
+among the empty cells times 8 plus block * 2 plus 1 for right rotations. The few values over 254, only possible in the
+first plies, are written as ESCAPE followed by the value minus ESCAPE."""
+import struct
+from collections import namedtuple
+
+from pyntago import CELL_COUNT, DIRECTION_LEFT, DIRECTION_RIGHT, FULL_MASK, TIE, Move, count_bits, rotate_mask
+
+MAGIC = b'PYNG\x01'
+ESCAPE = 255
+HEADER = struct.Struct('<BBBB')
+RESULT_CODES = {0: 0, 1: 1, TIE: 2, None: 3}  # winner side -> byte
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+# players are the names of white and black, winner the side that won, TIE or None for unfinished games
+GameRecord = namedtuple('GameRecord', 'players winner moves')
+
+
+def encode_moves(moves):
+    """The bytes of the moves of a game from its start."""
+    data = bytearray()
+    occupied = 0
+    for move in moves:
+        if occupied >> move.cell & 1:
+            raise ValueError("Cell {} is not empty".format(move.cell))
+        rank = move.cell - count_bits(occupied & ((1 << move.cell) - 1))
+        value = rank * 8 + move.block * 2 + (move.direction == DIRECTION_RIGHT)
+        if value < ESCAPE:
+            data.append(value)
+        else:
+            data += bytes((ESCAPE, value - ESCAPE))
+        occupied = rotate_mask(occupied | 1 << move.cell, move.block, move.direction)
+    return bytes(data)
+
+
+def decode_moves(data):
+    """The moves of a game from the bytes of encode_moves."""
+    moves = []
+    occupied = 0
+    values = iter(data)
+    for value in values:
+        if value == ESCAPE:
+            value = ESCAPE + next(values, CELL_COUNT * 8)
+        rank, rotation = divmod(value, 8)
+        cell = nth_empty(occupied, rank)
+        direction = DIRECTION_RIGHT if rotation & 1 else DIRECTION_LEFT
+        moves.append(Move(cell, rotation >> 1, direction))
+        occupied = rotate_mask(occupied | 1 << cell, rotation >> 1, direction)
+    return moves
+
+
+def nth_empty(occupied, rank):
+    """The cell of the given rank among the empty ones."""
+    empty = ~occupied & FULL_MASK
+    for _ in range(rank):
+        empty &= empty - 1
+    if not empty:
+        raise ValueError("No empty cell of rank {}".format(rank))
+    return (empty & -empty).bit_length() - 1
+
+
+class GameWriter:
+    """Appends game records to a binary stream, writing MAGIC first."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.stream.write(MAGIC)
+        self.games = 0
+
+    def write(self, players, winner, moves):
+        names = [name.encode('utf-8') for name in players]
+        data = encode_moves(moves)
+        if max(len(names[0]), len(names[1]), len(data)) > 255:
+            raise ValueError("Player names or moves too long to record")
+        self.stream.write(HEADER.pack(RESULT_CODES[winner], len(names[0]), len(names[1]), len(data)))
+        self.stream.write(names[0] + names[1] + data)
+        self.games += 1
+
+
+def read_games(stream):
+    """Yields the game records of a binary stream one at a time, reading only as much as each game needs."""
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a game record stream")
+    while True:
+        header = stream.read(HEADER.size)
+        if not header:
+            return
+        if len(header) < HEADER.size:
+            raise ValueError("Truncated game record")
+        result, white_length, black_length, moves_length = HEADER.unpack(header)
+        body = stream.read(white_length + black_length + moves_length)
+        if len(body) < white_length + black_length + moves_length or result not in RESULTS:
+            raise ValueError("Truncated or corrupt game record")
+        players = (body[:white_length].decode('utf-8'), body[white_length:white_length + black_length].decode('utf-8'))
+        moves = decode_moves(body[white_length + black_length:])
+        if len(moves) > CELL_COUNT:
+            raise ValueError("Game record with more than {} moves".format(CELL_COUNT))
+        yield GameRecord(players, RESULTS[result], moves)
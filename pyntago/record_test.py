@@ -0,0 +1,50 @@
+#! /usr/bin/env python
+import io
+import unittest
+
+import pyntago
+import record
+import selfplay
+
+
+class GameRecords(unittest.TestCase):
+    def setUp(self):
+        self.games = [selfplay.play_game([selfplay.RandomAgent(seed), selfplay.RandomAgent(seed + 1)], seed)
+                      for seed in range(20)]
+
+    def test_pack_a_ply_in_a_byte_after_the_first_plies(self):
+        moves = self.games[0].moves
+        data = record.encode_moves(moves)
+        self.assertLessEqual(len(data), len(moves) + 4)
+        self.assertEqual(record.decode_moves(data), moves)
+        last = pyntago.Move(35, 3, pyntago.DIRECTION_RIGHT)
+        self.assertEqual(record.encode_moves([last]), bytes((record.ESCAPE, 35 * 8 + 7 - record.ESCAPE)))
+        self.assertEqual(record.decode_moves(record.encode_moves([last])), [last])
+
+    def test_stream_the_games_back(self):
+        stream = io.BytesIO()
+        writer = record.GameWriter(stream)
+        for game in self.games:
+            writer.write(('random', 'random'), selfplay.result_side(game), game.moves)
+        writer.write(('White', 'Black'), None, [])
+        stream.seek(0)
+        games = record.read_games(stream)
+        first = self.games[0]
+        self.assertEqual(next(games), record.GameRecord(('random', 'random'), selfplay.result_side(first), first.moves))
+        self.assertEqual([game.moves for game in games][-2:], [self.games[-1].moves, []])
+
+    def test_reject_other_and_truncated_streams(self):
+        with self.assertRaises(ValueError):
+            list(record.read_games(io.BytesIO(b'not a record')))
+        stream = io.BytesIO()
+        record.GameWriter(stream).write(('a', 'b'), 0, self.games[0].moves)
+        with self.assertRaises(ValueError):
+            list(record.read_games(io.BytesIO(stream.getvalue()[:-1])))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
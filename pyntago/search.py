@@ -0,0 +1,195 @@
+"""Pyntago: negamax search with alpha-beta pruning and iterative deepening."""
+import time
+
+from evaluation import Evaluator, switch_sides
+from pyntago import (BLOCK_LINES, CELL_COUNT, CELL_LINES, FULL_MASK, TIE, Bitboard, count_bits, block_rotations,
+                     has_line, masks_winner, placement_rotations, rotate_mask)
+from positiondb import LOSS, WIN
+from transposition import TranspositionTable, place_key, rotate_key, switch_side_key, zobrist_hash
+
+WIN_SCORE = 1000000
+# Cells crossed by more lines are tried first
+CELL_ORDER = sorted(range(CELL_COUNT), key=lambda cell: -len(CELL_LINES[cell]))
+# The same order starting with a given cell, to try first the best cell found before
+CELL_ORDERS_FROM = [[cell] + [c for c in CELL_ORDER if c != cell] for cell in range(CELL_COUNT)]
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time budget is exhausted."""
+
+
+def legal_moves(own, other):
+    """One move for every different board the player with the own marbles can reach, in CELL_ORDER."""
+    return [move for move, _, _ in Bitboard(own, other).successors(0, CELL_ORDER)]
+
+
+def tablebase_score(evaluation, ply):
+    """Score of a tablebase evaluation like the ones of the search: wins and losses by the ply they happen."""
+    result, distance = evaluation
+    if result == WIN:
+        return WIN_SCORE - (ply + distance - 1)
+    elif result == LOSS:
+        return ply + distance - 1 - WIN_SCORE
+    return 0
+
+
+def to_table(score, ply):
+    """Wins and losses are stored as distances from the position instead of from the root."""
+    if score >= WIN_SCORE - CELL_COUNT:
+        return score + ply
+    elif score <= CELL_COUNT - WIN_SCORE:
+        return score - ply
+    return score
+
+
+def from_table(score, ply):
+    if score >= WIN_SCORE - CELL_COUNT:
+        return score - ply
+    elif score <= CELL_COUNT - WIN_SCORE:
+        return score + ply
+    return score
+
+
+class Searcher:
+    """Finds the best move for the player to move within a time budget in seconds.
+    Positions are given as the masks of the player to move and of the opponent.
+    Results are kept in the transposition table between searches. Positions in the optional endgame tablebase
+    (see tablebase.Tablebase) are not searched. Positions where the search stops are scored by the evaluator
+    (see evaluation.Evaluator), with line counts updated move by move along the searched line."""
+
+    def __init__(self, time_budget=1.0, max_depth=CELL_COUNT, table=None, tablebase=None, evaluator=None):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.table = table if table is not None else TranspositionTable()
+        self.tablebase = tablebase
+        self.evaluator = evaluator if evaluator is not None else Evaluator()
+        self.deadline = None
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.root_best = None
+
+    def best_move(self, own, other):
+        self.deadline = time.perf_counter() + self.time_budget
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.table.new_search()
+        # players alternate, so the marbles on the board tell which one is moving
+        side = count_bits(own | other) % 2
+        key = zobrist_hash(own, other, 0) if side == 0 else zobrist_hash(other, own, 1)
+        lines = self.evaluator.state(own, other)
+        moves = legal_moves(own, other)
+        best = moves[0]
+        empty_cells = CELL_COUNT - count_bits(own | other)
+        for depth in range(1, min(self.max_depth, empty_cells) + 1):
+            self.root_best = None
+            try:
+                self.score, best = self.search_root(own, other, side, key, lines, moves, depth)
+            except SearchTimeout:
+                # the first move searched is the previous best, so any move found better than it is
+                if self.root_best is not None:
+                    best = self.root_best
+                break
+            self.depth = depth
+            moves.remove(best)
+            moves.insert(0, best)
+            if abs(self.score) >= WIN_SCORE - CELL_COUNT:
+                break  # solved, deeper searches can not change the result
+        return best
+
+    def search_root(self, own, other, side, key, lines, moves, depth):
+        alpha = -WIN_SCORE - 1
+        best = None
+        for move in moves:
+            if best is not None:
+                self.check_time()
+            score = self.score_move(own, other, side, key, lines, move, depth, alpha, WIN_SCORE + 1, 0)
+            if score > alpha:
+                alpha = score
+                best = move
+                self.root_best = move
+        return alpha, best
+
+    def check_time(self):
+        if time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def score_move(self, own, other, side, key, lines, move, depth, alpha, beta, ply):
+        """Score of the move for the player making it, given the LineState before it."""
+        placed = own | 1 << move.cell
+        if placed | other != FULL_MASK and has_line(placed, CELL_LINES[move.cell]):
+            return WIN_SCORE - ply
+        return self.score_rotation(placed, other, side, place_key(key, side, move.cell),
+                                   self.evaluator.place(lines, move.cell),
+                                   move.block, move.direction, depth, alpha, beta, ply)
+
+    def score_rotation(self, own, other, side, key, lines, block, direction, depth, alpha, beta, ply):
+        if own | other == FULL_MASK:
+            return 0  # tie
+        rotated_own = rotate_mask(own, block, direction)
+        rotated_other = rotate_mask(other, block, direction)
+        result = masks_winner(rotated_own, rotated_other, BLOCK_LINES[block])
+        if result == TIE:
+            return 0
+        elif result == 0:
+            return WIN_SCORE - ply
+        elif result == 1:
+            return ply - WIN_SCORE
+        lines = self.evaluator.rotate(lines, own, other, block, direction)
+        if depth <= 1:
+            return lines.score
+        key = rotate_key(key, side, own, rotated_own, block)
+        key = switch_side_key(rotate_key(key, 1 - side, other, rotated_other, block))
+        return -self.negamax(rotated_other, rotated_own, 1 - side, key, switch_sides(lines), depth - 1,
+                             -beta, -alpha, ply + 1)
+
+    def negamax(self, own, other, side, key, lines, depth, alpha, beta, ply):
+        self.nodes += 1
+        self.check_time()
+        if self.tablebase is not None and CELL_COUNT - count_bits(own | other) <= self.tablebase.max_empty:
+            evaluation = self.tablebase.lookup(Bitboard(own, other) if side == 0 else Bitboard(other, own))
+            if evaluation is not None:
+                return tablebase_score(evaluation, ply)
+        cells = CELL_ORDER
+        entry = self.table.lookup(key)
+        if entry is not None:
+            if entry.depth >= depth:
+                score = from_table(entry.score, ply)
+                if entry.flag == TranspositionTable.EXACT:
+                    return score
+                elif entry.flag == TranspositionTable.LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+            if entry.cell is not None:
+                cells = CELL_ORDERS_FROM[entry.cell]
+        alpha_start = alpha
+        occupied = own | other
+        best = -WIN_SCORE - 1
+        best_cell = None
+        rotations = [block_rotations(own, other, block) for block in range(4)]
+        for cell in cells:
+            if occupied >> cell & 1:
+                continue
+            placed = own | 1 << cell
+            if placed | other != FULL_MASK and has_line(placed, CELL_LINES[cell]):
+                return WIN_SCORE - ply
+            placed_key = place_key(key, side, cell)
+            placed_lines = self.evaluator.place(lines, cell)
+            for block, direction in placement_rotations(rotations, placed, other, cell):
+                score = self.score_rotation(placed, other, side, placed_key, placed_lines, block, direction,
+                                            depth, alpha, beta, ply)
+                if score > best:
+                    best = score
+                    best_cell = cell
+                    if score > alpha:
+                        alpha = score
+                        if alpha >= beta:
+                            self.table.store(key, depth, to_table(best, ply), TranspositionTable.LOWER, cell)
+                            return best
+        flag = TranspositionTable.UPPER if best <= alpha_start else TranspositionTable.EXACT
+        self.table.store(key, depth, to_table(best, ply), flag, best_cell)
+        return best
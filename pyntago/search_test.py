@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+import time
+import unittest
+
+import pyntago
+import search
+
+
+class EmptyBoardSearch(unittest.TestCase):
+    def test_skips_the_moves_leading_to_the_same_board(self):
+        # every move leaves a single marble in one of the 36 cells
+        self.assertEqual(len(search.legal_moves(0, 0)), 36)
+
+    def test_answers_within_the_time_budget(self):
+        searcher = search.Searcher(time_budget=0.2)
+        start = time.perf_counter()
+        move = searcher.best_move(0, 0)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertIn(move, search.legal_moves(0, 0))
+        self.assertGreaterEqual(searcher.depth, 1)
+
+
+class AlmostFinishedRowSearch(unittest.TestCase):
+    def setUp(self):
+        # own: 4 marbles in the top row, other: 3 marbles in the third row
+        self.own = sum(1 << pyntago.cell_index(pyntago.Position(x, 0)) for x in range(4))
+        self.other = sum(1 << pyntago.cell_index(pyntago.Position(x, 2)) for x in range(3))
+
+    def test_completes_the_row(self):
+        searcher = search.Searcher(time_budget=1.0)
+        move = searcher.best_move(self.own, self.other)
+        self.assertEqual(move.cell, pyntago.cell_index(pyntago.Position(4, 0)))
+        self.assertEqual(searcher.score, search.WIN_SCORE)
+
+    def test_blocks_the_row_of_the_opponent(self):
+        searcher = search.Searcher(time_budget=1.0, max_depth=2)
+        move = searcher.best_move(self.other, self.own)
+        self.assertGreater(searcher.score, -search.WIN_SCORE + pyntago.CELL_COUNT)
+        board = pyntago.Bitboard(self.other, self.own).place(move.cell, 0).rotate(move.block, move.direction)
+        for cell in range(pyntago.CELL_COUNT):
+            if board.player_at(cell) is None:
+                self.assertIsNone(board.place(cell, 1).winner(['other', 'own']))
+
+
+class ComputerGame(unittest.TestCase):
+    def test_two_computer_players_finish_a_game(self):
+        manager = pyntago.EventManager()
+        game = pyntago.Game(manager)
+        computers = [pyntago.ComputerPlayer(manager, game, index, time_budget=0.01) for index in range(2)]
+        for _ in range(500):
+            if game.state == pyntago.Game.STATE_FINISHED:
+                break
+            manager.post(pyntago.CycleEvent())
+        self.assertEqual(game.state, pyntago.Game.STATE_FINISHED)
+        self.assertEqual(len(computers), 2)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
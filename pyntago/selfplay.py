@@ -0,0 +1,133 @@
+#! /usr/bin/env python
+"""Pyntago: headless games between computer agents, optionally in parallel worker processes.
+An agent is any object with the best_move(own, other) method of search.Searcher."""
+import argparse
+import functools
+import multiprocessing
+import random
+import time
+from collections import namedtuple
+
+from pyntago import CELL_COUNT, ROTATION_DIRECTIONS, TIE, Bitboard, Move
+from record import GameWriter
+
+# white is the index of the agent playing first, winner the index of the winning agent, TIE or None
+GameResult = namedtuple('GameResult', 'game white winner moves')
+
+
+class RandomAgent:
+    """Places a marble in a random empty cell and rotates a random block."""
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def best_move(self, own, other):
+        occupied = own | other
+        empty = [cell for cell in range(CELL_COUNT) if not occupied >> cell & 1]
+        return Move(self.random.choice(empty), self.random.randrange(4), self.random.choice(ROTATION_DIRECTIONS))
+
+
+def play_game(agents, game=0, white=0):
+    """Plays a whole game with the agent of index white moving first."""
+    board = Bitboard(0, 0)
+    moves = []
+    side = 0
+    players = [agents[white], agents[1 - white]]
+    while True:
+        move = players[side].best_move(board[side], board[1 - side])
+        moves.append(move)
+        board, result = board.play(move, side)
+        if result is not None:
+            winner = result if result == TIE else (white + result) % 2
+            return GameResult(game, white, winner, moves)
+        side = 1 - side
+
+
+def result_side(result):
+    """The side that won the game, TIE or None, instead of the agent."""
+    if result.winner is None or result.winner == TIE:
+        return result.winner
+    return 0 if result.winner == result.white else 1
+
+
+def _play_game(args):
+    factories, game, white = args
+    return play_game([factory() for factory in factories], game, white)
+
+
+def play_games(factories, games, workers=1, swap_sides=True):
+    """Yields the results of the games as they finish, in any order.
+    Agents are built with the two factories in the process playing each game, so they must be picklable
+    (classes, module level functions or functools.partial of them). The sides alternate when swap_sides."""
+    tasks = [(factories, game, game % 2 if swap_sides else 0) for game in range(games)]
+    if workers == 1:
+        for task in tasks:
+            yield _play_game(task)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        for result in pool.imap_unordered(_play_game, tasks, chunksize=max(1, games // (workers * 8))):
+            yield result
+
+
+def agent_factory(name, think_time, weights=None):
+    """Factory of the named agent, alphabeta evaluating with the line weights of the weights file if given."""
+    if name == 'random':
+        return RandomAgent
+    elif name == 'alphabeta':
+        from evaluation import Evaluator
+        from search import Searcher
+        evaluator = Evaluator.load(weights) if weights else None
+        return functools.partial(Searcher, think_time, evaluator=evaluator)
+    elif name == 'mcts':
+        from mcts import MonteCarloSearcher
+        return functools.partial(MonteCarloSearcher, think_time, 1)
+    raise ValueError("Unknown agent: {}".format(name))
+
+
+def main():
+    """Self play entry point, prints a line per game and a summary."""
+    agents = ['random', 'alphabeta', 'mcts']
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('first', choices=agents)
+    parser.add_argument('second', choices=agents)
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--think-time', type=float, default=0.1, help='seconds per move of the search agents')
+    parser.add_argument('--quiet', action='store_true', help='only print the summary')
+    parser.add_argument('--record', metavar='FILE', help='write the games to FILE as binary game records')
+    parser.add_argument('--book', metavar='FILE', help='opening book used by both agents')
+    parser.add_argument('--first-weights', metavar='FILE', help='line weights of the first agent if alphabeta')
+    parser.add_argument('--second-weights', metavar='FILE', help='line weights of the second agent if alphabeta')
+    args = parser.parse_args()
+    factories = [agent_factory(args.first, args.think_time, args.first_weights),
+                 agent_factory(args.second, args.think_time, args.second_weights)]
+    if args.book:
+        from book import book_agent
+        factories = [functools.partial(book_agent, args.book, factory) for factory in factories]
+    names = [args.first, args.second]
+    wins = [0, 0]
+    ties = 0
+    recording = open(args.record, 'wb') if args.record else None
+    writer = GameWriter(recording) if recording else None
+    start = time.perf_counter()
+    for result in play_games(factories, args.games, args.workers):
+        if writer:
+            sides = (names[result.white], names[1 - result.white])
+            writer.write(sides, result_side(result), result.moves)
+        if result.winner == TIE:
+            ties += 1
+        else:
+            wins[result.winner] += 1
+        if not args.quiet:
+            print("game {0}: {1} (white) vs {2}: {3} in {4} moves".format(
+                result.game, names[result.white], names[1 - result.white],
+                'tie' if result.winner == TIE else names[result.winner] + ' wins', len(result.moves)))
+    elapsed = time.perf_counter() - start
+    if recording:
+        recording.close()
+    print("{0} {1} - {2} {3}, {4} ties, {5:.0f} games per minute".format(
+        names[0], wins[0], wins[1], names[1], ties, args.games / elapsed * 60))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+#! /usr/bin/env python
+import unittest
+
+import pyntago
+import selfplay
+
+
+class RandomGames(unittest.TestCase):
+    def test_replaying_the_moves_gives_the_same_winner(self):
+        result = selfplay.play_game([selfplay.RandomAgent(1), selfplay.RandomAgent(2)])
+        board = pyntago.Bitboard(0, 0)
+        for ply, move in enumerate(result.moves):
+            board, winner = board.play(move, ply % 2)
+        self.assertEqual(winner, result.winner)
+        players = [pyntago.Player('White', pyntago.COLOR_WHITE), pyntago.Player('Black', pyntago.COLOR_BLACK)]
+        self.assertIsNotNone(pyntago.winner(board.to_dict(players), players))
+
+    def test_streams_every_game_from_the_workers(self):
+        results = list(selfplay.play_games([selfplay.RandomAgent, selfplay.RandomAgent], 20, workers=2))
+        self.assertEqual(sorted(result.game for result in results), list(range(20)))
+        self.assertEqual([result.white for result in sorted(results)][:4], [0, 1, 0, 1])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Pyntago: the 8 symmetries of the board.
+Rotating and mirroring the whole board maps blocks onto blocks and lines of five onto lines of five,
+so symmetric positions have the same winner and the same moves, mirrors turning left rotations right."""
+from pyntago import (BLOCK_CENTERS, CELL_COUNT, DIRECTION_LEFT, DIRECTION_RIGHT, Bitboard, Move, Position,
+                     block_for_position, cell_index, cell_position)
+
+IDENTITY = 0
+# Transforms of a position: the identity, 3 clockwise rotations of the board and 4 mirrors
+_TRANSFORMS = [lambda x, y: (x, y),
+               lambda x, y: (5 - y, x),
+               lambda x, y: (5 - x, 5 - y),
+               lambda x, y: (y, 5 - x),
+               lambda x, y: (5 - x, y),
+               lambda x, y: (x, 5 - y),
+               lambda x, y: (y, x),
+               lambda x, y: (5 - y, 5 - x)]
+TRANSFORMS = range(len(_TRANSFORMS))
+INVERSES = [0, 3, 2, 1, 4, 5, 6, 7]
+MIRRORS = [False, False, False, False, True, True, True, True]
+
+
+def transform_position(position, transform):
+    return Position(*_TRANSFORMS[transform](position.x, position.y))
+
+
+def _row_tables(transform):
+    """Transformed mask of every 6 bit pattern of every row."""
+    tables = []
+    for y in range(6):
+        destinations = [1 << cell_index(transform_position(Position(x, y), transform)) for x in range(6)]
+        tables.append(tuple(sum(bit for x, bit in enumerate(destinations) if pattern >> x & 1)
+                            for pattern in range(64)))
+    return tables
+
+
+ROW_TABLES = [_row_tables(transform) for transform in TRANSFORMS]
+CELL_MAPS = [[cell_index(transform_position(cell_position(cell), transform)) for cell in range(CELL_COUNT)]
+             for transform in TRANSFORMS]
+BLOCK_MAPS = [[block_for_position(transform_position(center, transform)) for center in BLOCK_CENTERS]
+              for transform in TRANSFORMS]
+
+
+def transform_mask(mask, transform):
+    tables = ROW_TABLES[transform]
+    return (tables[0][mask & 63] | tables[1][mask >> 6 & 63] | tables[2][mask >> 12 & 63] |
+            tables[3][mask >> 18 & 63] | tables[4][mask >> 24 & 63] | tables[5][mask >> 30 & 63])
+
+
+def transform_board(board, transform):
+    return Bitboard(transform_mask(board.first, transform), transform_mask(board.second, transform))
+
+
+def transform_move(move, transform):
+    direction = move.direction
+    if MIRRORS[transform]:
+        direction = DIRECTION_RIGHT if direction == DIRECTION_LEFT else DIRECTION_LEFT
+    return Move(CELL_MAPS[transform][move.cell], BLOCK_MAPS[transform][move.block], direction)
+
+
+def canonical(board):
+    """The symmetric board with the lowest packed value and the transform that gives it from the board."""
+    best, best_transform = board, IDENTITY
+    best_packed = board.pack()
+    for transform in TRANSFORMS[1:]:
+        candidate = transform_board(board, transform)
+        packed = candidate.pack()
+        if packed < best_packed:
+            best, best_transform, best_packed = candidate, transform, packed
+    return best, best_transform
+
+
+def canonical_key(board):
+    """Packed value of the canonical board, the same for every board of a symmetry class."""
+    return canonical(board)[0].pack()
+
+
+def to_canonical_move(move, transform):
+    """Move on the canonical board equivalent to the move on the original board."""
+    return transform_move(move, transform)
+
+
+def from_canonical_move(move, transform):
+    """Move on the original board equivalent to the move on the canonical board."""
+    return transform_move(move, INVERSES[transform])
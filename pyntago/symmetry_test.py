@@ -0,0 +1,45 @@
+#! /usr/bin/env python
+import unittest
+
+import pyntago
+import symmetry
+
+players = [pyntago.Player('White', pyntago.COLOR_WHITE), pyntago.Player('Black', pyntago.COLOR_BLACK)]
+
+
+class AsymmetricBoard(unittest.TestCase):
+    def setUp(self):
+        self.board = pyntago.Bitboard(0, 0)
+        for turn, cell in enumerate([0, 7, 9, 20, 33, 5, 13]):
+            self.board = self.board.place(cell, turn % 2)
+
+    def test_inverse_transforms_give_back_the_board(self):
+        for transform in symmetry.TRANSFORMS:
+            transformed = symmetry.transform_board(self.board, transform)
+            self.assertEqual(symmetry.transform_board(transformed, symmetry.INVERSES[transform]), self.board)
+            self.assertEqual(transformed.stones(), self.board.stones())
+
+    def test_all_symmetric_boards_have_the_same_canonical_board(self):
+        canonical, transform = symmetry.canonical(self.board)
+        self.assertEqual(symmetry.transform_board(self.board, transform), canonical)
+        for other in symmetry.TRANSFORMS:
+            self.assertEqual(symmetry.canonical(symmetry.transform_board(self.board, other))[0], canonical)
+
+    def test_moves_commute_with_the_transforms(self):
+        move = pyntago.Move(16, 1, pyntago.DIRECTION_LEFT)
+        after = self.board.place(move.cell, 1).rotate(move.block, move.direction)
+        for transform in symmetry.TRANSFORMS:
+            board = symmetry.transform_board(self.board, transform)
+            moved = symmetry.to_canonical_move(move, transform)
+            transformed_after = board.place(moved.cell, 1).rotate(moved.block, moved.direction)
+            self.assertEqual(transformed_after, symmetry.transform_board(after, transform))
+            self.assertEqual(transformed_after.winner(players), after.winner(players))
+            self.assertEqual(symmetry.from_canonical_move(moved, transform), move)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
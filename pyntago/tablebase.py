@@ -0,0 +1,192 @@
+#! /usr/bin/env python
+"""Pyntago: endgame tablebase with the exact value of positions with few empty cells.
+Every position with K empty cells is far too many (about 10^11 for a single one), so the tablebase holds the positions
+with at most K empty cells reachable from seed positions. They are expanded level by level, by number of empty cells,
+and solved backwards from the level with one empty cell. Values are stored in a position database (see positiondb)
+as the result for the player to move and the plies until the end with best play: the fastest win, the slowest loss."""
+import argparse
+import multiprocessing
+import random
+
+from pyntago import CELL_COUNT, TIE, Bitboard, count_bits
+from positiondb import DRAW, LOSS, WIN, Evaluation, build, read_records
+from symmetry import canonical
+
+MAX_DISTANCE = 64  # over any game length, so values keep the ordering of the evaluations
+
+_lower = {}  # values of the level below, set in the worker processes
+
+
+def empty_cells(board):
+    return CELL_COUNT - count_bits(board.occupied())
+
+
+def value(evaluation):
+    """Single number ordering the evaluations for the player to move: faster wins and slower losses are higher."""
+    result, distance = evaluation
+    if result == WIN:
+        return MAX_DISTANCE - distance
+    elif result == LOSS:
+        return distance - MAX_DISTANCE
+    return 0
+
+
+def solve(board, lower):
+    """Evaluation of a position without winner, given the evaluations of the level below by canonical key."""
+    side = count_bits(board.occupied()) % 2
+    best = None
+    for _, after, result in board.successors(side):
+        if result is None:
+            child = lower[canonical(after)[0].pack()]
+            evaluation = Evaluation(-child.result, child.depth + 1)
+        elif result == TIE:
+            evaluation = Evaluation(DRAW, 1)
+        else:
+            evaluation = Evaluation(WIN if result == side else LOSS, 1)
+        if best is None or value(evaluation) > value(best):
+            best = evaluation
+            if value(best) == MAX_DISTANCE - 1:
+                break  # can not win faster
+    return best
+
+
+def expand(packed_boards):
+    """Canonical packed boards without winner one ply after the packed boards."""
+    following = set()
+    for packed in packed_boards:
+        board = Bitboard.unpack(packed)
+        for _, after, result in board.successors(count_bits(board.occupied()) % 2):
+            if result is None:
+                following.add(canonical(after)[0].pack())
+    return following
+
+
+def _set_lower(lower):
+    global _lower
+    _lower = lower
+
+
+def _solve_chunk(packed_boards):
+    return [(packed, solve(Bitboard.unpack(packed), _lower)) for packed in packed_boards]
+
+
+def _chunks(items, count):
+    items = list(items)
+    size = max(1, -(-len(items) // count))
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def solve_positions(seeds, max_empty, workers=1):
+    """Dict of canonical packed board -> Evaluation of the positions without winner with at most max_empty empty
+    cells reachable from the seed Bitboards, solved with the given number of processes."""
+    levels = {empty: set() for empty in range(1, max_empty + 1)}
+    for seed in seeds:
+        if 0 < empty_cells(seed) <= max_empty:
+            levels[empty_cells(seed)].add(canonical(seed)[0].pack())
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    try:
+        for empty in range(max_empty, 1, -1):
+            if pool is None:
+                levels[empty - 1] |= expand(levels[empty])
+            else:
+                for following in pool.imap_unordered(expand, _chunks(levels[empty], workers * 4)):
+                    levels[empty - 1] |= following
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    values = {}
+    for empty in range(1, max_empty + 1):
+        lower = {packed: values[packed] for packed in levels.get(empty - 1, ())}
+        if workers == 1:
+            _set_lower(lower)
+            solved = _solve_chunk(levels[empty])
+        else:
+            # a pool per level, so the workers start with the values of the level below
+            with multiprocessing.Pool(workers, initializer=_set_lower, initargs=(lower,)) as pool:
+                solved = [item for chunk in pool.imap_unordered(_solve_chunk, _chunks(levels[empty], workers * 4))
+                          for item in chunk]
+        values.update(solved)
+    _set_lower({})
+    return values
+
+
+class Tablebase:
+    """Evaluations of positions by canonical packed board, held in a dict for constant time lookups."""
+
+    def __init__(self, values):
+        self.values = values
+        self.max_empty = max((empty_cells(Bitboard.unpack(packed)) for packed in values), default=0)
+
+    def __len__(self):
+        return len(self.values)
+
+    @classmethod
+    def load(cls, path):
+        return cls({int.from_bytes(key, 'big'): Evaluation(result, depth)
+                    for key, result, depth in read_records(path)})
+
+    def save(self, path):
+        return build(path, self.values.items())
+
+    def lookup(self, board):
+        """Evaluation of the Bitboard for the player to move, None if it is not in the tablebase."""
+        if empty_cells(board) > self.max_empty:
+            return None
+        return self.values.get(canonical(board)[0].pack())
+
+
+def random_seeds(count, max_empty, seed=None):
+    """Positions with max_empty empty cells from random games that last that long."""
+    if max_empty < 1:
+        raise ValueError("Games end when the board is full, seeds need at least one empty cell")
+    rng = random.Random(seed)
+    seeds = []
+    while len(seeds) < count:
+        board = Bitboard(0, 0)
+        side = 0
+        while board is not None and empty_cells(board) > max_empty:
+            board, result = board.play(rng.choice(board.moves(side)), side)
+            if result is not None:
+                board = None
+            side = 1 - side
+        if board is not None:
+            seeds.append(board)
+    return seeds
+
+
+def recorded_seeds(paths, max_empty):
+    """Positions with max_empty empty cells of recorded games that last that long."""
+    from record import read_games
+    seeds = []
+    for path in paths:
+        with open(path, 'rb') as stream:
+            for game in read_games(stream):
+                board = Bitboard(0, 0)
+                for ply, move in enumerate(game.moves):
+                    if empty_cells(board) == max_empty:
+                        seeds.append(board)
+                        break
+                    board, _ = board.play(move, ply % 2)
+    return seeds
+
+
+def main():
+    """Tablebase tool: solves the endgames of recorded or random games."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('tablebase')
+    parser.add_argument('--empty', type=int, default=4, help='most empty cells of the positions solved')
+    parser.add_argument('--records', nargs='+', default=[], help='game records with the seed positions')
+    parser.add_argument('--random', type=int, default=0, help='seed positions from this many random games')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+    if args.empty < 1:
+        parser.error("--empty must be at least 1")
+    seeds = recorded_seeds(args.records, args.empty) + random_seeds(args.random, args.empty)
+    tablebase = Tablebase(solve_positions(seeds, args.empty, args.workers))
+    tablebase.save(args.tablebase)
+    print("{0} positions from {1} seeds in {2}".format(len(tablebase), len(seeds), args.tablebase))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#! /usr/bin/env python
+import os
+import tempfile
+import unittest
+
+import positiondb
+import pyntago
+import search
+import symmetry
+import tablebase
+
+
+def side_masks(board):
+    side = board.stones() % 2
+    return board[side], board[1 - side]
+
+
+class EndgameTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.seeds = tablebase.random_seeds(3, 4, seed=1)
+        cls.tablebase = tablebase.Tablebase(tablebase.solve_positions(cls.seeds, 4))
+
+    def test_need_an_empty_cell_in_the_seeds(self):
+        self.assertRaises(ValueError, tablebase.random_seeds, 1, 0)
+
+    def test_solve_the_same_in_several_processes(self):
+        self.assertEqual(tablebase.solve_positions(self.seeds, 4, workers=2), self.tablebase.values)
+        self.assertEqual(self.tablebase.max_empty, 4)
+
+    def test_agree_with_full_depth_searches(self):
+        for packed, (result, distance) in sorted(self.tablebase.values.items())[::40]:
+            board = pyntago.Bitboard.unpack(packed)
+            searcher = search.Searcher(time_budget=60.0)
+            searcher.best_move(*side_masks(board))
+            expected = {positiondb.WIN: search.WIN_SCORE - (distance - 1), positiondb.DRAW: 0,
+                        positiondb.LOSS: distance - 1 - search.WIN_SCORE}[result]
+            self.assertEqual(searcher.score, expected)
+
+    def test_answer_the_search_without_searching_the_endgame(self):
+        for seed in self.seeds:
+            plain = search.Searcher(time_budget=60.0)
+            plain.best_move(*side_masks(seed))
+            with_tablebase = search.Searcher(time_budget=60.0, tablebase=self.tablebase)
+            with_tablebase.best_move(*side_masks(seed))
+            self.assertEqual(with_tablebase.score, plain.score)
+            self.assertLessEqual(with_tablebase.nodes, plain.nodes)
+
+    def test_save_and_load(self):
+        descriptor, path = tempfile.mkstemp()
+        os.close(descriptor)
+        try:
+            self.tablebase.save(path)
+            loaded = tablebase.Tablebase.load(path)
+        finally:
+            os.remove(path)
+        self.assertEqual(loaded.values, self.tablebase.values)
+        self.assertEqual(loaded.lookup(self.seeds[0]), self.tablebase.values[symmetry.canonical_key(self.seeds[0])])
+        self.assertIsNone(loaded.lookup(pyntago.Bitboard(0, 0)))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Pyntago: Zobrist hashing and a transposition table for the searches."""
+import random
+from collections import namedtuple
+
+from pyntago import CELL_COUNT, block_pattern, block_positions, cell_index
+
+# Random 64 bit keys for a marble of each player in each cell, xored together to hash a board
+_random = random.Random(20160612)
+PIECE_KEYS = [[_random.getrandbits(64) for _ in range(CELL_COUNT)] for _ in range(2)]
+SIDE_KEY = _random.getrandbits(64)
+
+
+def _block_keys(player, block):
+    """Xor of the keys of the marbles for every 9 bit pattern of the block, see block_pattern()."""
+    cell_keys = [PIECE_KEYS[player][cell_index(pos)] for pos in block_positions(block)]
+    keys = [0] * 512
+    for pattern in range(1, 512):
+        low_bit = pattern & -pattern
+        keys[pattern] = keys[pattern ^ low_bit] ^ cell_keys[low_bit.bit_length() - 1]
+    return keys
+
+
+BLOCK_KEYS = [[_block_keys(player, block) for block in range(4)] for player in range(2)]
+
+
+def zobrist_hash(first, second, side):
+    """Hash of the board with the masks of both players and the index of the player to move."""
+    key = SIDE_KEY if side else 0
+    for player, mask in enumerate((first, second)):
+        for block in range(4):
+            key ^= BLOCK_KEYS[player][block][block_pattern(mask, block)]
+    return key
+
+
+def place_key(key, player, cell):
+    """Hash after the player places a marble in the cell, the side to move does not change."""
+    return key ^ PIECE_KEYS[player][cell]
+
+
+def rotate_key(key, player, mask, rotated_mask, block):
+    """Hash after the rotation of the block turns the mask of the player into the rotated mask."""
+    keys = BLOCK_KEYS[player][block]
+    return key ^ keys[block_pattern(mask, block)] ^ keys[block_pattern(rotated_mask, block)]
+
+
+def switch_side_key(key):
+    return key ^ SIDE_KEY
+
+
+Entry = namedtuple('Entry', 'key depth score flag cell generation')
+
+
+class TranspositionTable:
+    """Fixed size hash table of search results.
+    Every bucket holds two entries: one kept while it is the deepest of the current search and
+    one always replaced, so memory is bounded by the number of buckets."""
+    EXACT = 0
+    LOWER = 1  # the score is a lower bound, the search failed high
+    UPPER = 2  # the score is an upper bound, the search failed low
+
+    def __init__(self, buckets=1 << 16):
+        self.buckets = buckets
+        self.deep = [None] * buckets
+        self.recent = [None] * buckets
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Lets the entries of older searches be replaced by shallower ones."""
+        self.generation += 1
+
+    def clear(self):
+        self.deep = [None] * self.buckets
+        self.recent = [None] * self.buckets
+
+    def lookup(self, key):
+        index = key % self.buckets
+        deep = self.deep[index]
+        if deep is not None and deep.key == key:
+            self.hits += 1
+            return deep
+        recent = self.recent[index]
+        if recent is not None and recent.key == key:
+            self.hits += 1
+            return recent
+        self.misses += 1
+        if deep is not None or recent is not None:
+            self.collisions += 1
+        return None
+
+    def store(self, key, depth, score, flag, cell=None):
+        index = key % self.buckets
+        entry = Entry(key, depth, score, flag, cell, self.generation)
+        deep = self.deep[index]
+        self.stores += 1
+        if deep is None or deep.key == key or depth >= deep.depth or deep.generation != self.generation:
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'collisions': self.collisions, 'stores': self.stores}
@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+import unittest
+
+import pyntago
+import transposition
+
+
+class IncrementalHash(unittest.TestCase):
+    def setUp(self):
+        self.board = pyntago.Bitboard(0, 0)
+        self.key = transposition.zobrist_hash(0, 0, 0)
+
+    def play(self, cell, player, block, direction):
+        placed = self.board.place(cell, player)
+        key = transposition.place_key(self.key, player, cell)
+        rotated = placed.rotate(block, direction)
+        for index in range(2):
+            key = transposition.rotate_key(key, index, placed[index], rotated[index], block)
+        self.board = rotated
+        self.key = transposition.switch_side_key(key)
+
+    def test_matches_the_hash_computed_from_scratch(self):
+        for turn, (cell, block) in enumerate([(0, 0), (7, 0), (21, 3), (35, 1), (14, 2), (8, 0)]):
+            self.play(cell, turn % 2, block, pyntago.DIRECTION_LEFT if turn % 3 else pyntago.DIRECTION_RIGHT)
+            self.assertEqual(self.key, transposition.zobrist_hash(self.board.first, self.board.second, (turn + 1) % 2))
+
+    def test_depends_on_the_side_to_move(self):
+        self.assertNotEqual(transposition.zobrist_hash(1, 2, 0), transposition.zobrist_hash(1, 2, 1))
+
+
+class SmallTable(unittest.TestCase):
+    def setUp(self):
+        self.table = transposition.TranspositionTable(buckets=1)
+
+    def test_counts_hits_misses_and_collisions(self):
+        self.assertIsNone(self.table.lookup(5))
+        self.table.store(5, 3, 10, transposition.TranspositionTable.EXACT, 7)
+        self.assertEqual(self.table.lookup(5).score, 10)
+        self.assertIsNone(self.table.lookup(6))
+        self.assertEqual(self.table.stats(), {'hits': 1, 'misses': 2, 'collisions': 1, 'stores': 1})
+
+    def test_keeps_the_deepest_entry(self):
+        self.table.store(5, 3, 10, transposition.TranspositionTable.EXACT)
+        self.table.store(6, 1, 20, transposition.TranspositionTable.EXACT)
+        self.table.store(7, 2, 30, transposition.TranspositionTable.EXACT)
+        self.assertEqual(self.table.lookup(5).depth, 3)
+        self.assertIsNone(self.table.lookup(6))
+        self.assertEqual(self.table.lookup(7).depth, 2)
+
+    def test_replaces_deep_entries_of_older_searches(self):
+        self.table.store(5, 3, 10, transposition.TranspositionTable.EXACT)
+        self.table.new_search()
+        self.table.store(6, 1, 20, transposition.TranspositionTable.EXACT)
+        self.assertIsNone(self.table.lookup(5))
+        self.assertEqual(self.table.lookup(6).depth, 1)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,514 @@
+"""Pyntago: pygame rendering of the board and keyboard input."""
+import math
+import os
+from collections import OrderedDict
+
+import pygame
+from pygame.locals import *
+
+from pyntago import (COLOR_BLACK, COLOR_BLOCK, COLOR_GREEN, COLOR_HOLE, COLOR_TRANSPARENT, COLOR_WHITE,
+                     DIRECTION_DOWN, DIRECTION_LEFT, DIRECTION_RIGHT, DIRECTION_UP, BlockCursorHideEvent,
+                     BlockCursorMoveEvent, BlockCursorPlaceEvent, BoardBuiltEvent, CycleEvent,
+                     DirectionCursorHideEvent, DirectionCursorMoveEvent, DirectionCursorPlaceEvent,
+                     GameBlockRotationUIEvent, GameBlockSelectionUIEvent, GameFinishedUIEvent,
+                     GameMessageUpdateEvent, GameMoveUIEvent, PositionCursorHideEvent, PositionCursorMoveEvent,
+                     PositionCursorPlaceEvent, RequestMoveEvent, RequestQuitEvent, RequestSelectEvent,
+                     block_for_position, block_positions, position_in_block)
+
+
+class KeyboardController:
+    """Takes pygame events from the keyboard to control the model."""
+
+    def __init__(self, event_manager):
+        self.manager = event_manager
+        self.manager.register_listener(self, {CycleEvent: self.on_cycle})
+        self.pending = []
+
+    def wait_for_input(self, timeout):
+        """Blocks until there is a pygame event or the timeout in seconds passes."""
+        input_event = pygame.event.wait(int(timeout * 1000))
+        if input_event.type != NOEVENT:
+            self.pending.append(input_event)
+
+    def on_cycle(self, event):
+        input_events = self.pending + pygame.event.get()
+        self.pending = []
+        for input_event in input_events:
+            new_event = None
+            if input_event.type == QUIT:
+                new_event = RequestQuitEvent()
+            elif input_event.type == KEYDOWN:
+                if input_event.key == K_ESCAPE:
+                    new_event = RequestQuitEvent()
+                elif input_event.key == K_UP or input_event.key == K_w:
+                    new_event = RequestMoveEvent(DIRECTION_UP)
+                elif input_event.key == K_DOWN or input_event.key == K_s:
+                    new_event = RequestMoveEvent(DIRECTION_DOWN)
+                elif input_event.key == K_LEFT or input_event.key == K_a:
+                    new_event = RequestMoveEvent(DIRECTION_LEFT)
+                elif input_event.key == K_RIGHT or input_event.key == K_d:
+                    new_event = RequestMoveEvent(DIRECTION_RIGHT)
+                elif input_event.key == K_RETURN:
+                    new_event = RequestSelectEvent()
+            if new_event:
+                self.manager.post(new_event)
+
+
+class BlockCursorSprite(pygame.sprite.Sprite):
+    def __init__(self, group=None):
+        if group is not None:
+            pygame.sprite.Sprite.__init__(self, group)
+        else:
+            pygame.sprite.Sprite.__init__(self)
+        self.image = pygame.Surface((300, 300))
+        self.image = self.image.convert_alpha()
+        self.image.fill(COLOR_TRANSPARENT)
+        self.color = COLOR_GREEN
+        self.last_color = self.color
+        pygame.draw.rect(self.image, self.color, (10, 10, 280, 280), 3)
+        self.rect = self.image.get_rect()
+        self.move_to = None
+
+    def update(self):
+        if self.move_to:
+            self.rect.center = self.move_to
+            self.move_to = None
+        if self.last_color != self.color:
+            pygame.draw.rect(self.image, self.color, (10, 10, 280, 280), 3)
+            self.last_color = self.color
+
+
+class PositionCursorSprite(pygame.sprite.Sprite):
+    def __init__(self, group=None):
+        if group is not None:
+            pygame.sprite.Sprite.__init__(self, group)
+        else:
+            pygame.sprite.Sprite.__init__(self)
+        self.image = pygame.Surface((100, 100))
+        self.image = self.image.convert_alpha()
+        self.image.fill(COLOR_TRANSPARENT)
+        self.color = COLOR_GREEN
+        self.last_color = self.color
+        pygame.draw.rect(self.image, self.color, (10, 10, 80, 80), 3)
+        self.rect = self.image.get_rect()
+        self.move_to = None
+
+    def update(self):
+        if self.move_to:
+            self.rect.topleft = self.move_to
+            self.move_to = None
+        if self.last_color != self.color:
+            pygame.draw.rect(self.image, self.color, (10, 10, 80, 80), 3)
+            self.last_color = self.color
+
+
+class DirectionCursorSprite(pygame.sprite.Sprite):
+    def __init__(self, group=None):
+        if group is not None:
+            pygame.sprite.Sprite.__init__(self, group)
+        else:
+            pygame.sprite.Sprite.__init__(self)
+        self.color = COLOR_GREEN
+        self.direction = None
+        self.draw()
+        self.last_color = self.color
+        self.last_direction = self.direction
+        self.rect = self.image.get_rect()
+
+    def update(self):
+        if self.last_color != self.color or self.direction != self.last_direction:
+            self.draw()
+            self.last_color = self.color
+            self.last_direction = self.direction
+
+    def draw(self):
+        self.image = surfaces.direction_arrows(self.color, self.direction)
+
+
+def degrees_to_radians(deg):
+    return deg / 180.0 * math.pi
+
+
+# End of the arrows of the direction cursor relative to the center of the block
+ARROW_X_OFFSET = 100 * math.sin(degrees_to_radians(20))
+ARROW_Y_OFFSET = 100 * math.cos(degrees_to_radians(20))
+ROTATION_FRAMES = 12  # frames of the animation of a block rotation
+
+# Screen geometry of the board: the rect of every block and the top left corner of every cell
+BLOCK_RECTS = [pygame.Rect(125 + 301 * (block % 2), 124 + 301 * (block // 2), 300, 300) for block in range(4)]
+CELL_CORNERS = {position: (BLOCK_RECTS[block].x + 100 * (position.x % 3), BLOCK_RECTS[block].y + 100 * (position.y % 3))
+                for block in range(4) for position in block_positions(block)}
+
+
+class SurfaceCache:
+    """Block and marble surfaces drawn once and then only blitted, fonts loaded once and the most recent texts.
+    They are drawn on first use, which must come after the display mode is set."""
+
+    def __init__(self, max_texts=32, max_rotations=16):
+        self.block_surface = None
+        self.marble_surfaces = {}
+        self.arrow_surfaces = {}  # (color, direction) -> surface
+        self.fonts = {}  # (name, size) -> font
+        self.text_surfaces = OrderedDict()  # (text, name, size, color) -> surface, least recently used first
+        self.max_texts = max_texts
+        self.rotation_frames = OrderedDict()  # (contents, direction) -> surfaces, least recently used first
+        self.max_rotations = max_rotations
+
+    @staticmethod
+    def recent(cache, key, limit, make):
+        """The value of the key in the LRU cache, made and stored if missing, dropping the oldest over the limit."""
+        value = cache.get(key)
+        if value is None:
+            value = make()
+            cache[key] = value
+            if len(cache) > limit:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return value
+
+    def block(self):
+        """An empty block with its 9 holes."""
+        if self.block_surface is None:
+            block = pygame.Surface((300, 300)).convert()
+            block.fill(COLOR_BLOCK)
+            hole = pygame.Surface((100, 100)).convert_alpha()
+            hole.fill(COLOR_TRANSPARENT)
+            pygame.draw.circle(hole, COLOR_HOLE, (50, 50), 20, 3)
+            for i in range(3):
+                for j in range(3):
+                    block.blit(hole, (i * 100, j * 100))
+            self.block_surface = block
+        return self.block_surface
+
+    def marble(self, color):
+        """A marble of the color covering a hole."""
+        marble = self.marble_surfaces.get(color)
+        if marble is None:
+            marble = pygame.Surface((100, 100)).convert()
+            marble.fill(COLOR_BLOCK)
+            pygame.draw.circle(marble, color, (50, 50), 25)
+            self.marble_surfaces[color] = marble
+        return marble
+
+    def font(self, name, size):
+        """The system font of the name and size, looked up and loaded only the first time."""
+        font = self.fonts.get((name, size))
+        if font is None:
+            font = pygame.font.SysFont(name, size)
+            self.fonts[(name, size)] = font
+        return font
+
+    def text(self, text, name, size, color):
+        """The text rendered with the font, kept while it is among the max_texts most recently used."""
+        return self.recent(self.text_surfaces, (text, name, size, color), self.max_texts,
+                           lambda: self.font(name, size).render(text, 1, color))
+
+    def contents_block(self, contents):
+        """A block with the marbles of the contents."""
+        block = self.block().copy()
+        for (x, y), player in contents.items():
+            block.blit(self.marble(player.color), (x * 100, y * 100))
+        return block
+
+    def rotation(self, contents, direction):
+        """The frames of the animation of the block with the contents turning a notch in the direction.
+        Each frame is the block rotated and shrunk to fit in its place over the background."""
+        def make():
+            block = self.contents_block(contents).convert_alpha()
+            sign = 1 if direction == DIRECTION_LEFT else -1
+            frames = []
+            for frame in range(1, ROTATION_FRAMES):
+                angle = 90.0 * frame / ROTATION_FRAMES
+                radians = degrees_to_radians(angle)
+                scale = 1 / (abs(math.cos(radians)) + abs(math.sin(radians)))
+                rotated = pygame.transform.rotozoom(block, sign * angle, scale)
+                image = pygame.Surface((300, 300)).convert()
+                image.fill(COLOR_WHITE)
+                image.blit(rotated, rotated.get_rect(center=(150, 150)))
+                frames.append(image)
+            return frames
+        return self.recent(self.rotation_frames, (frozenset(contents.items()), direction), self.max_rotations, make)
+
+    def direction_arrows(self, color, direction):
+        """The arrows of the direction cursor, both when no direction is chosen yet."""
+        arrows = self.arrow_surfaces.get((color, direction))
+        if arrows is None:
+            arrows = pygame.Surface((300, 300)).convert_alpha()
+            arrows.fill(COLOR_TRANSPARENT)
+            if direction == DIRECTION_LEFT or direction is None:
+                pygame.draw.arc(arrows, color, (50, 50, 200, 200), degrees_to_radians(110),
+                                degrees_to_radians(250), 3)
+                arrow_start_pos = (150 - ARROW_X_OFFSET, 150 + ARROW_Y_OFFSET)
+                arrow_left_end_pos = (arrow_start_pos[0] - 20, arrow_start_pos[1] + 5)
+                arrow_top_end_pos = (arrow_start_pos[0] - 5, arrow_start_pos[1] - 20)
+                pygame.draw.line(arrows, color, arrow_start_pos, arrow_left_end_pos, 3)
+                pygame.draw.line(arrows, color, arrow_start_pos, arrow_top_end_pos, 3)
+            if direction == DIRECTION_RIGHT or direction is None:
+                pygame.draw.arc(arrows, color, (50, 50, 200, 200), degrees_to_radians(290),
+                                degrees_to_radians(70), 3)
+                arrow_start_pos = (150 + ARROW_X_OFFSET, 150 + ARROW_Y_OFFSET)
+                arrow_right_end_pos = (arrow_start_pos[0] + 20, arrow_start_pos[1] + 5)
+                arrow_top_end_pos = (arrow_start_pos[0] + 5, arrow_start_pos[1] - 20)
+                pygame.draw.line(arrows, color, arrow_start_pos, arrow_right_end_pos, 3)
+                pygame.draw.line(arrows, color, arrow_start_pos, arrow_top_end_pos, 3)
+            self.arrow_surfaces[(color, direction)] = arrows
+        return arrows
+
+
+surfaces = SurfaceCache()
+
+
+def block_contents(board):
+    """The marbles of every block as dicts of position in the block -> player."""
+    contents = [{}, {}, {}, {}]
+    for pos, player in board.items():
+        block = block_for_position(pos)
+        contents[block][position_in_block(pos, block)] = player
+    return contents
+
+
+class BlockSprite(pygame.sprite.Sprite):
+    def __init__(self, block, group=None):
+        if group is not None:
+            pygame.sprite.Sprite.__init__(self, group)
+        else:
+            pygame.sprite.Sprite.__init__(self)
+        self.block = block
+        self.image = None
+        self.contents = {}  # position in block -> player
+        self.board_changed = True
+        self.frames = []  # rotation animation frames still to show
+
+    def update_board(self, board):
+        contents = block_contents(board)[self.block]
+        if contents != self.contents:
+            self.update_contents(contents)
+
+    def update_contents(self, contents):
+        self.contents = contents
+        self.board_changed = True
+        self.frames = []
+
+    def rotate_contents(self, contents, direction):
+        """Changes to the contents animating the rotation of the previous ones."""
+        frames = surfaces.rotation(self.contents, direction)
+        self.update_contents(contents)
+        self.frames = list(frames)
+
+    def update(self):
+        if self.frames:
+            self.draw_frame(self.frames.pop(0))
+        elif self.board_changed:
+            self.draw_block()
+            self.draw_marbles()
+            self.board_changed = False
+
+    def draw_frame(self, frame):
+        if self.image is None:
+            self.image = pygame.Surface((300, 300)).convert()
+        self.image.blit(frame, (0, 0))
+
+    def draw_block(self):
+        if self.image is None:
+            self.image = pygame.Surface((300, 300)).convert()
+        self.image.blit(surfaces.block(), (0, 0))
+
+    def draw_marbles(self):
+        for (x, y), player in self.contents.items():
+            self.image.blit(surfaces.marble(player.color), (x * 100, y * 100))
+
+
+class MessageSprite(pygame.sprite.Sprite):
+    def __init__(self, rect, font_color, font_size, font_name, group=None):
+        if group is not None:
+            pygame.sprite.Sprite.__init__(self, group)
+        else:
+            pygame.sprite.Sprite.__init__(self)
+        self.rect = Rect(rect)
+        self.font_color = font_color
+        self.font_size = font_size
+        self.font_name = font_name
+        self.text = None
+        self.last_text = None
+        self.image = pygame.Surface((self.rect.width, self.rect.height)).convert_alpha()
+        self.image.fill(COLOR_TRANSPARENT)
+
+    def update(self):
+        if self.last_text != self.text:
+            self.image.fill(COLOR_TRANSPARENT)
+            text_surf = surfaces.text(self.text, self.font_name, self.font_size, self.font_color)
+            text_width = text_surf.get_width()
+            text_height = text_surf.get_height()
+            self.image.blit(text_surf, (self.rect.width / 2 - text_width / 2,
+                                        self.rect.height / 2 - text_height / 2))
+            self.last_text = self.text
+
+
+class PygameView:
+    def __init__(self, event_manager):
+        self.manager = event_manager
+        self.manager.register_listener(self, {CycleEvent: self.on_cycle,
+                                              BoardBuiltEvent: self.on_board_built,
+                                              BlockCursorPlaceEvent: self.on_block_cursor_place,
+                                              BlockCursorMoveEvent: self.on_block_cursor_move,
+                                              BlockCursorHideEvent: self.on_block_cursor_hide,
+                                              DirectionCursorPlaceEvent: self.on_direction_cursor_place,
+                                              DirectionCursorMoveEvent: self.on_direction_cursor_move,
+                                              DirectionCursorHideEvent: self.on_direction_cursor_hide,
+                                              PositionCursorPlaceEvent: self.on_position_cursor_place,
+                                              PositionCursorMoveEvent: self.on_position_cursor_move,
+                                              PositionCursorHideEvent: self.on_position_cursor_hide,
+                                              GameMessageUpdateEvent: self.on_message_update,
+                                              GameMoveUIEvent: self.on_board_change,
+                                              GameBlockRotationUIEvent: self.on_rotation_ui,
+                                              GameBlockSelectionUIEvent: self.on_board_change,
+                                              GameFinishedUIEvent: self.on_game_finished})
+        os.environ['SDL_VIDEO_CENTERED'] = '1'
+        pygame.init()
+        self.window = pygame.display.set_mode((850, 900))
+        pygame.display.set_caption('Pyntago')
+        self.background = pygame.Surface(self.window.get_size())
+        self.background.fill(COLOR_BLACK)
+        self.window.blit(self.background, (0, 0))
+        pygame.display.flip()
+        self.back_sprites = pygame.sprite.RenderUpdates()
+        self.front_sprites = pygame.sprite.RenderUpdates()
+        self.message_sprite = MessageSprite((0, 850, 850, 50), COLOR_BLACK, 35, 'Comic Sans MS', self.front_sprites)
+        self.block_cursor_sprite = BlockCursorSprite()
+        self.direction_cursor_sprite = DirectionCursorSprite()
+        self.position_cursor_sprite = PositionCursorSprite()
+        self.block_sprites = [None] * 4
+        self.rendered_contents = [None] * 4  # last contents given to each block sprite
+        self.rotating = False  # a rotation was asked for and the board has not shown it yet
+
+    def show_board(self, game):
+        self.background.fill(COLOR_WHITE)
+        self.window.blit(self.background, (0, 0))
+        pygame.display.flip()
+        for block in game.blocks:
+            new_sprite = BlockSprite(block, self.back_sprites)
+            new_sprite.rect = BLOCK_RECTS[block].copy()
+            self.block_sprites[block] = new_sprite
+            self.rendered_contents[block] = None
+
+    def update_board(self, board, rotation=None):
+        """Hands the new contents only to the block sprites whose blocks changed, animating the (block, direction)
+        rotation that led to the board if given."""
+        for block, contents in enumerate(block_contents(board)):
+            previous = self.rendered_contents[block]
+            if contents != previous:
+                self.rendered_contents[block] = contents
+                if previous and rotation is not None and rotation[0] == block:
+                    self.block_sprites[block].rotate_contents(contents, rotation[1])
+                else:
+                    self.block_sprites[block].update_contents(contents)
+
+    def played_rotation(self, game):
+        """The (block, direction) of the cursors if the board changes after a rotation, None otherwise."""
+        if not self.rotating:
+            return None
+        self.rotating = False
+        return game.block_cursor.block, game.direction_cursor.direction
+
+    def show_block_cursor(self, block_cursor):
+        self.block_cursor_sprite.color = block_cursor.player.color
+        self.block_cursor_sprite.rect.center = BLOCK_RECTS[block_cursor.block].center
+        self.front_sprites.add(self.block_cursor_sprite)
+
+    def move_block_cursor(self, block_cursor):
+        self.block_cursor_sprite.color = block_cursor.player.color
+        self.block_cursor_sprite.move_to = BLOCK_RECTS[block_cursor.block].center
+
+    def hide_block_cursor(self):
+        self.block_cursor_sprite.kill()
+
+    def show_direction_cursor(self, direction_cursor):
+        self.direction_cursor_sprite.color = direction_cursor.player.color
+        block_cursor_sprite = self.block_cursor_sprite
+        self.direction_cursor_sprite.rect.center = block_cursor_sprite.rect.center
+        self.direction_cursor_sprite.direction = direction_cursor.direction
+        self.front_sprites.add(self.direction_cursor_sprite)
+
+    def move_direction_cursor(self, direction_cursor):
+        self.direction_cursor_sprite.color = direction_cursor.player.color
+        self.direction_cursor_sprite.direction = direction_cursor.direction
+
+    def hide_direction_cursor(self):
+        self.direction_cursor_sprite.kill()
+
+    def update_position_cursor_sprite(self, position_cursor):
+        self.position_cursor_sprite.move_to = CELL_CORNERS[position_cursor.position]
+
+    def show_position_cursor(self, position_cursor):
+        self.position_cursor_sprite.color = position_cursor.player.color
+        self.update_position_cursor_sprite(position_cursor)
+        self.front_sprites.add(self.position_cursor_sprite)
+
+    def move_position_cursor(self, position_cursor):
+        self.update_position_cursor_sprite(position_cursor)
+
+    def hide_position_cursor(self):
+        self.position_cursor_sprite.kill()
+
+    def show_message(self, game):
+        self.message_sprite.text = game.message
+        pygame.display.set_caption("Pyntago: " + game.message)
+
+    def get_block_sprite(self, block):
+        return self.block_sprites[block]
+
+    def on_cycle(self, event):
+        self.back_sprites.clear(self.window, self.background)
+        self.front_sprites.clear(self.window, self.background)
+        self.back_sprites.update()
+        self.front_sprites.update()
+        dirty_rects_back = self.back_sprites.draw(self.window)
+        dirt_rects_front = self.front_sprites.draw(self.window)
+        pygame.display.update(dirt_rects_front + dirty_rects_back)
+
+    def on_board_built(self, event):
+        self.show_board(event.game)
+
+    def on_block_cursor_place(self, event):
+        self.show_block_cursor(event.block_cursor)
+
+    def on_block_cursor_move(self, event):
+        self.move_block_cursor(event.block_cursor)
+
+    def on_block_cursor_hide(self, event):
+        self.hide_block_cursor()
+
+    def on_direction_cursor_place(self, event):
+        self.show_direction_cursor(event.direction_cursor)
+
+    def on_direction_cursor_move(self, event):
+        self.move_direction_cursor(event.direction_cursor)
+
+    def on_direction_cursor_hide(self, event):
+        self.hide_direction_cursor()
+
+    def on_position_cursor_place(self, event):
+        self.show_position_cursor(event.position_cursor)
+
+    def on_position_cursor_move(self, event):
+        self.move_position_cursor(event.position_cursor)
+
+    def on_position_cursor_hide(self, event):
+        self.hide_position_cursor()
+
+    def on_message_update(self, event):
+        self.show_message(event.game)
+
+    def on_board_change(self, event):
+        self.update_board(event.game.board, self.played_rotation(event.game))
+
+    def on_rotation_ui(self, event):
+        self.update_board(event.game.board)
+        self.rotating = True
+
+    def on_game_finished(self, event):
+        self.hide_position_cursor()
+        self.hide_block_cursor()
+        self.hide_direction_cursor()
+        self.update_board(event.game.board, self.played_rotation(event.game))
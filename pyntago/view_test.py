@@ -0,0 +1,138 @@
+#! /usr/bin/env python
+import os
+import unittest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+import pyntago
+import view
+
+players = [pyntago.Player('White', pyntago.COLOR_WHITE), pyntago.Player('Black', pyntago.COLOR_BLACK)]
+
+
+class BlockSpriteDrawing(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        pygame.display.set_mode((850, 900))
+
+    def setUp(self):
+        self.sprite = view.BlockSprite(1)
+        self.sprite.update_board({pyntago.Position(4, 1): players[1], pyntago.Position(0, 0): players[0]})
+        self.sprite.update()
+
+    def test_draws_the_marbles_of_its_block(self):
+        self.assertEqual(self.sprite.image.get_at((150, 150))[:3], pyntago.COLOR_BLACK)
+        self.assertEqual(self.sprite.image.get_at((50, 50))[:3], pyntago.COLOR_BLOCK)
+
+    def test_is_not_redrawn_when_its_block_does_not_change(self):
+        self.sprite.update_board({pyntago.Position(4, 1): players[1], pyntago.Position(1, 1): players[0]})
+        self.assertFalse(self.sprite.board_changed)
+        self.sprite.update_board({pyntago.Position(4, 1): players[1], pyntago.Position(3, 0): players[0]})
+        self.assertTrue(self.sprite.board_changed)
+
+    def test_shares_the_cached_surfaces(self):
+        self.assertIs(view.surfaces.marble(pyntago.COLOR_BLACK), view.surfaces.marble(pyntago.COLOR_BLACK))
+        self.assertIs(view.surfaces.block(), view.surfaces.block())
+
+
+class TextCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        pygame.init()
+        pygame.display.set_mode((850, 900))
+
+    def setUp(self):
+        self.cache = view.SurfaceCache(max_texts=2)
+
+    def test_loads_each_font_once(self):
+        self.assertIs(self.cache.font('Comic Sans MS', 35), self.cache.font('Comic Sans MS', 35))
+        self.assertIsNot(self.cache.font('Comic Sans MS', 35), self.cache.font('Comic Sans MS', 20))
+
+    def test_keeps_the_most_recently_used_texts(self):
+        white = self.cache.text("White's turn", 'Comic Sans MS', 35, pyntago.COLOR_BLACK)
+        black = self.cache.text("Black's turn", 'Comic Sans MS', 35, pyntago.COLOR_BLACK)
+        self.assertIs(self.cache.text("White's turn", 'Comic Sans MS', 35, pyntago.COLOR_BLACK), white)
+        self.cache.text("White wins", 'Comic Sans MS', 35, pyntago.COLOR_BLACK)
+        self.assertIs(self.cache.text("White's turn", 'Comic Sans MS', 35, pyntago.COLOR_BLACK), white)
+        self.assertIsNot(self.cache.text("Black's turn", 'Comic Sans MS', 35, pyntago.COLOR_BLACK), black)
+
+
+class BoardViewUpdates(unittest.TestCase):
+    def setUp(self):
+        self.manager = pyntago.EventManager()
+        self.view = view.PygameView(self.manager)
+        self.game = pyntago.Game(self.manager)
+        self.manager.post(pyntago.CycleEvent())
+        self.manager.post(pyntago.CycleEvent())
+
+    def changed_blocks(self, board):
+        self.view.update_board(board)
+        changed = [sprite.block for sprite in self.view.back_sprites if sprite.board_changed]
+        self.manager.post(pyntago.CycleEvent())
+        return sorted(changed)
+
+    def test_only_redraws_the_blocks_that_changed(self):
+        board = {pyntago.Position(4, 4): players[0]}
+        self.assertEqual(self.changed_blocks(board), [3])
+        self.assertEqual(self.changed_blocks(dict(board)), [])
+        self.assertEqual(self.changed_blocks(pyntago.rotate(board, 0)), [])
+        board[pyntago.Position(0, 0)] = players[1]
+        self.assertEqual(self.changed_blocks(board), [0])
+        self.assertEqual(self.changed_blocks(pyntago.rotate(board, 0)), [0])
+
+    def test_places_the_cursors_with_the_board_geometry(self):
+        self.assertEqual([self.view.get_block_sprite(block).rect.topleft for block in range(4)],
+                         [(125, 124), (426, 124), (125, 425), (426, 425)])
+        self.assertEqual([self.view.get_block_sprite(block).block for block in range(4)], list(range(4)))
+        self.game.position_cursor.move(pyntago.DIRECTION_DOWN)
+        self.manager.post(pyntago.CycleEvent())
+        self.assertEqual(self.view.position_cursor_sprite.rect.topleft, (325, 425))
+
+    def test_animates_the_rotation_of_a_block(self):
+        board = {pyntago.Position(0, 0): players[0], pyntago.Position(1, 0): players[1]}
+        self.changed_blocks(board)
+        sprite = self.view.get_block_sprite(0)
+        for direction in pyntago.ROTATION_DIRECTIONS:
+            before = view.block_contents(board)[0]
+            board = pyntago.rotate(board, 0, direction)
+            self.view.update_board(board, (0, direction))
+            self.assertIs(sprite.frames[0], view.surfaces.rotation(before, direction)[0])
+            for _ in range(view.ROTATION_FRAMES - 1):
+                self.manager.post(pyntago.CycleEvent())
+            self.assertEqual(sprite.frames, [])
+            self.manager.post(pyntago.CycleEvent())
+            (x, y), = [pos for pos, player in board.items() if player == players[0]]
+            self.assertEqual(sprite.image.get_at((x * 100 + 50, y * 100 + 50))[:3], pyntago.COLOR_WHITE)
+
+    def test_animates_the_rotation_played_in_the_game(self):
+        # a half turn leaves the block as it is, so its contents alone can not tell the direction
+        board = {pyntago.Position(0, 0): players[0], pyntago.Position(2, 2): players[0]}
+        self.game.board = dict(board)
+        self.manager.post(pyntago.GameBlockSelectionUIEvent(self.game))
+        self.manager.post(pyntago.GameBlockRotationUIEvent(self.game))
+        self.game.block_cursor.block = 0
+        self.game.direction_cursor.direction = pyntago.DIRECTION_RIGHT
+        self.game.board = pyntago.rotate(board, 0, pyntago.DIRECTION_RIGHT)
+        self.manager.post(pyntago.GameMoveUIEvent(self.game))
+        sprite = self.view.get_block_sprite(0)
+        self.assertIs(sprite.frames[0], view.surfaces.rotation(view.block_contents(board)[0],
+                                                               pyntago.DIRECTION_RIGHT)[0])
+        self.manager.post(pyntago.GameMoveUIEvent(self.game))
+        self.assertEqual(len(sprite.frames), view.ROTATION_FRAMES - 1)
+
+    def test_shares_the_direction_arrows(self):
+        sprite = self.view.direction_cursor_sprite
+        sprite.direction = pyntago.DIRECTION_LEFT
+        sprite.update()
+        self.assertIs(sprite.image, view.surfaces.direction_arrows(sprite.color, pyntago.DIRECTION_LEFT))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()